@@ -0,0 +1,81 @@
+"""
+Benchmark the validator's startup: how long `--help` takes, and the time from
+launching `python -m rv` to its first request reaching the (dummy) server.
+
+Usage: python benchmarks/startup.py [--validator examples.issue_reporting] [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FirstRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.first_request_time = (self.server.first_request_time or time.perf_counter())
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'[]')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_help(validator):
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-m', 'rv', validator, '--help'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, check=True,
+    )
+    return time.perf_counter() - start
+
+
+def time_to_first_request(validator, server):
+    server.first_request_time = None
+    endpoint = 'http://%s:%d/' % server.server_address
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'rv', validator, '--endpoint', endpoint],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    while server.first_request_time is None and process.poll() is None:
+        time.sleep(0.001)
+    process.kill()
+    process.wait()
+    if server.first_request_time is None:
+        raise RuntimeError('the validator exited without making a request')
+    return server.first_request_time - start
+
+
+def report(label, timings):
+    print('%-24s min %7.1f ms   median %7.1f ms   max %7.1f ms' % (
+        label,
+        min(timings) * 1000,
+        statistics.median(timings) * 1000,
+        max(timings) * 1000,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--validator', default='examples.issue_reporting')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    server = HTTPServer(('127.0.0.1', 0), FirstRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    time_help(args.validator)  # Warm up the OS caches and the validator registry
+    report('--help', [time_help(args.validator) for x in range(args.runs)])
+    report('time to first request', [time_to_first_request(args.validator, server) for x in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,13 @@ from operator import ge, le
 from click import Option
 
 from rv.params import DateTimeParam, Param
+from rv.sampling import SamplingPolicy
 from rv.shell import BaseValidator
+from rv.slo import LatencySLO
+from rv.suites.caching import ConditionalGetSuite
+from rv.suites.differential import DifferentialSuite
 from rv.suites.lists import Limits, ListTester
+from rv.suites.wire import WireEfficiencySuite, WireThresholds
 
 from .schema import ISSUE_SCHEMA
 
@@ -39,7 +44,38 @@ class IssueReportingValidator(BaseValidator):
                 default=100,
                 type=int,
             ),
+            Option(
+                param_decls=('--sample-above', 'sample_above'),
+                default=0,
+                type=int,
+                help='check only a sample of the items of responses with at least this many items (0: check all)',
+            ),
+            Option(
+                param_decls=('--detection-probability', 'detection_probability'),
+                default=0.99,
+                type=float,
+                help='probability with which samples should catch a 1% defect rate',
+            ),
+            Option(
+                param_decls=('--audit-wire/--no-audit-wire', 'audit_wire'),
+                default=False,
+                help='also audit the wire efficiency (compression, page sizes, caching) of the endpoint',
+            ),
+            Option(
+                param_decls=('--audit-caching/--no-audit-caching', 'audit_caching'),
+                default=False,
+                help='also test conditional requests (ETag/Last-Modified) to the endpoint',
+            ),
+            Option(
+                param_decls=('--candidate-endpoint', 'candidate_endpoint'),
+                default=None,
+                help='also run the queries against this endpoint, comparing its items and latencies to the endpoint\'s',
+            ),
+        ]
 
+    def get_slos(self, **kwargs):
+        return [
+            LatencySLO(group='baseline', threshold=2),
         ]
 
     def get_suites(
@@ -48,8 +84,20 @@ class IssueReportingValidator(BaseValidator):
         page_size=500,
         max_single_tests_per_param=10,
         max_multi_tests=100,
+        sample_above=0,
+        detection_probability=0.99,
+        audit_wire=False,
+        audit_caching=False,
+        candidate_endpoint=None,
         **kwargs
     ):
+        updated_after = DateTimeParam(
+            property='updated_datetime',
+            parameter='updated_after',
+            operator=ge,
+            bucket=day_bucket,
+            discrete=False,
+        )
         tester = ListTester(
             endpoint=endpoint,
             schema=ISSUE_SCHEMA,
@@ -59,20 +107,38 @@ class IssueReportingValidator(BaseValidator):
                 # TODO: Maybe sometime in the future these could be preset instead of read from the baseline?
                 #       In that case, though, we can't raise an error if we don't get any items at all...
                 Param(property='status'),
-                Param(property='service_code'),
+                Param(property='service_code', slo=LatencySLO(percentile=95, threshold=0.3)),
 
                 # Continuous-values parameters with differing property/parameters, and comparison functions.
                 DateTimeParam(property='requested_datetime', parameter='start_date', operator=ge, bucket=day_bucket, discrete=False),
                 DateTimeParam(property='requested_datetime', parameter='end_date', operator=le, bucket=day_bucket, discrete=False),
-                DateTimeParam(property='updated_datetime', parameter='updated_after', operator=ge, bucket=day_bucket, discrete=False),
+                updated_after,
                 DateTimeParam(property='updated_datetime', parameter='updated_before', operator=le, bucket=day_bucket, discrete=False),
             ],
             limits=Limits(
                 max_single_tests_per_param=max_single_tests_per_param,
                 max_multi_tests=max_multi_tests,
             ),
+            id_property='service_request_id',
+            refresh_param=updated_after,
+            sampling=(
+                SamplingPolicy(full_below=sample_above, detection_probability=detection_probability)
+                if sample_above else None
+            ),
         )
         tester.base_params = {
             'page_size': page_size,
         }
         yield tester
+        if audit_wire:
+            wire_suite = WireEfficiencySuite(
+                endpoint=endpoint,
+                page_sizes=sorted({10, 100, page_size}),
+                thresholds=WireThresholds(max_bytes_per_item=2048, min_compression_ratio=2),
+            )
+            wire_suite.base_params = tester.base_params
+            yield wire_suite
+        if audit_caching:
+            yield ConditionalGetSuite(list_tester=tester)
+        if candidate_endpoint:
+            yield DifferentialSuite(list_tester=tester, candidate_endpoint=candidate_endpoint)
@@ -0,0 +1,384 @@
+"""
+Sharded execution of test plans across worker processes.
+
+The coordinator builds the plan (the suites and their tests), then hands out
+shards of serialized tests to workers connected over a local socket protocol
+(line-delimited JSON messages).  The workers run the tests and stream compact
+records of the results back; the coordinator replaces its planned tests with
+`RecordedTest`s, so reporting works as if everything had been run locally.
+
+The conversation between a coordinator and a worker goes like this:
+
+* worker: ``{"type": "hello", "pid": ...}``
+* coordinator: ``{"type": "plan", "validator": "some.Validator", "params": {...}}``
+* coordinator: ``{"type": "shard", "shard": 1, "tests": [{"suite": ..., "index": ..., "spec": ...}, ...]}``
+* worker: ``{"type": "result", "suite": ..., "index": ..., "record": {...}}`` for each test
+* worker: ``{"type": "done", "shard": 1, "counters": {...}}``
+* ...more shards and results...
+* coordinator: ``{"type": "bye"}``
+
+If a worker dies (or goes silent for too long), the tests of its shard
+that have no results yet are put back in the queue for another worker.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from rv.events import get_default_bus
+from rv.instrumentation import counters
+from rv.shell import BaseValidator
+from rv.tests.recorded import RecordedTest
+from rv.utils import find_class
+
+log = logging.getLogger(__name__)
+
+
+def parse_address(address, default_host='127.0.0.1'):
+    """
+    Parse a `host:port` (or just `port`) string into a tuple.
+
+    :rtype: tuple[str, int]
+    """
+    host, _, port = str(address).rpartition(':')
+    return (host or default_host, int(port))
+
+
+class Connection(object):
+    """
+    A line-delimited JSON message channel over a socket.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = sock.makefile('r', encoding='utf-8')
+        self.writer = sock.makefile('w', encoding='utf-8')
+
+    def send(self, **message):
+        self.writer.write(json.dumps(message, default=str) + '\n')
+        self.writer.flush()
+
+    def receive(self):
+        line = self.reader.readline()
+        if not line:
+            raise EOFError('connection closed')
+        return json.loads(line)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # Wakes up any thread blocked reading from the socket
+        except OSError:
+            pass
+        for closeable in (self.reader, self.writer, self.sock):
+            try:
+                closeable.close()
+            except OSError:  # pragma: no cover
+                pass
+
+
+class Shard(object):
+    """
+    A batch of serialized tests to be run by a single worker.
+    """
+
+    def __init__(self, id, entries):
+        """
+        :param id: Shard identifier
+        :param entries: List of `{"suite": ..., "index": ..., "spec": ...}` dicts
+        """
+        self.id = id
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class Coordinator(object):
+    """
+    Builds the test plan and distributes it to workers.
+    """
+
+    def __init__(
+        self,
+        *,
+        validator,
+        params,
+        address=None,
+        workers=0,
+        shard_size=20,
+        worker_timeout=300,
+        on_test_finished=None,
+        events=None
+    ):
+        """
+        :param validator: The validator object whose suites are being run.
+        :param params: The (JSON-serializable) option values the suites were built with.
+        :param address: The `host:port` to listen on for workers. Defaults to a random local port.
+        :param workers: The number of local worker processes to spawn.
+        :param shard_size: The number of tests to hand to a worker at a time.
+        :param worker_timeout: Seconds to wait for a worker's next result before considering it dead.
+        :param on_test_finished: An optional callable to call with each test as soon as its result is in.
+        :param events: The `rv.events.EventBus` to publish the progress to. By default, it is printed to stdout.
+        """
+        self.validator_path = '%s.%s' % (validator.__class__.__module__, validator.__class__.__name__)
+        self.params = params
+        self.address = parse_address(address or 0)
+        self.num_workers = int(workers or 0)
+        self.shard_size = max(1, int(shard_size))
+        self.worker_timeout = worker_timeout
+        self.on_test_finished = on_test_finished
+        self.events = (events or get_default_bus())
+        self.lock = threading.Lock()
+        self.completed = threading.Event()
+        self.pending = queue.Queue()
+        self.suites = {}
+        self.outstanding = set()
+        self.active_workers = 0
+        self.connections = set()
+        self.processes = []
+
+    def plan(self, suites):
+        """
+        Build the suites' tests, and split them into tests to run locally and shards for the workers.
+
+        :return: List of (suite, test) tuples to run locally
+        """
+        local_tests = []
+        entries = []
+        for suite in suites:
+            self.suites[suite.name] = suite
+            for index, test in enumerate(suite.tests):
+                spec = suite.serialize_test(test)
+                if spec is None:
+                    local_tests.append((suite, test))
+                else:
+                    entries.append({'suite': suite.name, 'index': index, 'spec': spec})
+        for shard_id, offset in enumerate(range(0, len(entries), self.shard_size), 1):
+            self.pending.put(Shard(shard_id, entries[offset:offset + self.shard_size]))
+        self.outstanding = {(entry['suite'], entry['index']) for entry in entries}
+        return local_tests
+
+    def run(self, suites):
+        """
+        Run all the tests of the given suites, locally and in workers.
+        """
+        local_tests = self.plan(suites)
+        for suite in suites:
+            self.events.publish('suite_started', suite=suite, total=len(suite.tests))
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(self.address)
+        server.listen(16)
+        self.address = server.getsockname()
+        log.info('coordinator listening on %s:%d', *self.address)
+        threading.Thread(target=self.accept_workers, args=(server,), daemon=True).start()
+        self.spawn_workers()
+        try:
+            for suite, test in local_tests:
+                self.events.publish('test_started', suite=suite, test=test)
+                test.run()
+                self.report_result(test)
+            while not self.is_complete():
+                self.wait_for_workers()
+            for suite in suites:
+                self.events.publish('suite_finished', suite=suite)
+        finally:
+            server.close()
+            self.stop_workers()
+
+    def spawn_workers(self):
+        for x in range(self.num_workers):
+            command = [sys.executable, '-m', 'rv', 'worker', '%s:%d' % self.address]
+            self.processes.append(subprocess.Popen(command))
+
+    def stop_workers(self, timeout=10):
+        """
+        Stop the workers: if the run was cut short, by closing their connections (as they've not been told
+        to stop); then wait up to `timeout` seconds for the spawned ones to exit, and terminate the rest.
+        """
+        if not self.is_complete():
+            self.close_connections()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            try:
+                process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                log.warning('terminating worker process %d', process.pid)
+                process.terminate()
+                try:
+                    process.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        self.close_connections()
+
+    def close_connections(self):
+        with self.lock:
+            connections = list(self.connections)
+        for conn in connections:
+            conn.close()
+
+    def accept_workers(self, server):
+        while True:
+            try:
+                sock, peer = server.accept()
+            except OSError:  # The server socket was closed; we're done.
+                return
+            threading.Thread(target=self.serve_worker, args=(sock, peer), daemon=True).start()
+
+    def wait_for_workers(self, timeout=1):
+        """
+        Wait a while for the workers to make progress.
+
+        Should every spawned worker be dead with nobody else connected,
+        the remaining shards are run in this process instead.
+        """
+        with self.lock:
+            orphaned = (
+                self.processes and
+                not self.active_workers and
+                all(process.poll() is not None for process in self.processes)
+            )
+        if not orphaned:
+            self.completed.wait(timeout)
+            return
+        try:
+            shard = self.pending.get_nowait()
+        except queue.Empty:
+            return
+        log.warning('no live workers; running shard %d locally', shard.id)
+        for entry in shard.entries:
+            test = self.suites[entry['suite']].deserialize_test(entry['spec'])
+            test.run()
+            self.record_result(entry['suite'], entry['index'], test.get_record())
+
+    def is_complete(self):
+        with self.lock:
+            return not self.outstanding
+
+    def next_shard(self):
+        """
+        Get the next shard to hand out, waiting for requeued shards as long as results are outstanding.
+
+        :return: Shard, or None if there's nothing left to do.
+        :rtype: Shard|None
+        """
+        while not self.is_complete():
+            try:
+                return self.pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def serve_worker(self, sock, peer):
+        sock.settimeout(self.worker_timeout)
+        conn = Connection(sock)
+        shard = None
+        worker_counters = {}
+        with self.lock:
+            self.active_workers += 1
+            self.connections.add(conn)
+        try:
+            hello = conn.receive()
+            log.info('worker %s (pid %s) connected', peer, hello.get('pid'))
+            conn.send(type='plan', validator=self.validator_path, params=self.params)
+            while True:
+                shard = self.next_shard()
+                if shard is None:
+                    conn.send(type='bye')
+                    break
+                conn.send(type='shard', shard=shard.id, tests=shard.entries)
+                worker_counters = self.receive_shard(conn, shard)
+                shard = None
+        except (OSError, EOFError, ValueError) as exc:
+            log.warning('lost worker %s: %s', peer, exc)
+            if shard:
+                self.requeue(shard)
+        finally:
+            with self.lock:
+                self.active_workers -= 1
+                self.connections.discard(conn)
+            counters.merge(worker_counters)
+            conn.close()
+
+    def receive_shard(self, conn, shard):
+        """
+        Receive the results of a shard.
+
+        :return: The worker's instrumentation counters' snapshot
+        """
+        while True:
+            message = conn.receive()
+            if message['type'] == 'done':
+                return message.get('counters', {})
+            if message['type'] == 'result':
+                self.record_result(message['suite'], message['index'], message['record'])
+
+    def requeue(self, shard):
+        with self.lock:
+            remaining = [
+                entry for entry in shard.entries
+                if (entry['suite'], entry['index']) in self.outstanding
+            ]
+        if remaining:
+            log.info('reassigning %d tests of shard %d', len(remaining), shard.id)
+            self.pending.put(Shard(shard.id, remaining))
+
+    def record_result(self, suite_name, index, record):
+        """
+        Merge a result record into the plan, replacing the planned test.
+        """
+        with self.lock:
+            key = (suite_name, index)
+            if key not in self.outstanding:  # A duplicate from a reassigned shard
+                return
+            self.outstanding.discard(key)
+            if not self.outstanding:
+                self.completed.set()
+            suite = self.suites[suite_name]
+            test = suite.tests[index] = RecordedTest(suite=suite, record=record)
+        self.report_result(test)
+
+    def report_result(self, test):
+        with self.lock:
+            if self.on_test_finished:
+                self.on_test_finished(test)
+            self.events.publish_test_finished(test)
+
+
+class Worker(object):
+    """
+    Runs shards of tests handed out by a `Coordinator`.
+    """
+
+    def __init__(self, address):
+        self.address = parse_address(address)
+        self.suites = {}
+
+    def run(self):
+        conn = Connection(socket.create_connection(self.address))
+        try:
+            conn.send(type='hello', pid=os.getpid())
+            plan = conn.receive()
+            validator = find_class(plan['validator'], BaseValidator)()
+            self.suites = {suite.name: suite for suite in validator.get_suites(**plan['params'])}
+            while True:
+                message = conn.receive()
+                if message['type'] == 'bye':
+                    break
+                self.run_shard(conn, message)
+        finally:
+            conn.close()
+
+    def run_shard(self, conn, message):
+        log.info('running shard %s (%d tests)', message['shard'], len(message['tests']))
+        for entry in message['tests']:
+            test = self.suites[entry['suite']].deserialize_test(entry['spec'])
+            test.run()
+            conn.send(type='result', suite=entry['suite'], index=entry['index'], record=test.get_record())
+        conn.send(type='done', shard=message['shard'], counters=counters.snapshot())
@@ -0,0 +1,253 @@
+"""
+Test lifecycle events.
+
+The runners (`Suite.run`, the budget `Scheduler`, the `Watcher` and the distributed `Coordinator`)
+publish events to an `EventBus` as they go:
+
+* `suite_started` (`suite`, and `total`, the number of tests about to be run),
+* `test_started` (`suite`, `test`; not published for tests run by distributed workers),
+* `error` (`suite`, `test`, `error`) for each error a test found,
+* `test_finished` (`suite`, `test`),
+* `suite_finished` (`suite`).
+
+Every event also has the `time` (per `rv.utils.wallclock`) it was published at.
+
+A threaded bus hands the events to its subscribers in a background thread, so that
+subscribers writing to terminals, files or sockets don't slow the run down.
+"""
+import logging
+import queue
+import sys
+import threading
+from collections import Counter
+
+from rv.utils import wallclock
+
+log = logging.getLogger(__name__)
+
+
+class Event(object):
+
+    def __init__(self, type, **data):
+        self.type = type
+        self.time = wallclock()
+        vars(self).update(data)
+
+    def __repr__(self):
+        return '<Event %s>' % self.type
+
+
+class Subscriber(object):
+    """
+    Base class for event subscribers; dispatches events to their `on_<event type>` methods, if any.
+    """
+
+    def handle(self, event):
+        method = getattr(self, 'on_%s' % event.type, None)
+        if method:
+            method(event)
+
+    def close(self):
+        pass
+
+
+class EventBus(object):
+
+    def __init__(self, subscribers=(), *, threaded=False):
+        """
+        :param subscribers: The `Subscriber`s to hand the events to.
+        :param threaded: Whether to hand the events to the subscribers in a background thread
+                         (as opposed to as they are published).
+        """
+        self.subscribers = list(subscribers)
+        self.queue = None
+        self.thread = None
+        if threaded:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self.dispatch_forever, name='rv-events', daemon=True)
+            self.thread.start()
+
+    def publish(self, type, **data):
+        event = Event(type, **data)
+        if self.queue:
+            self.queue.put(event)
+        else:
+            self.dispatch(event)
+
+    def publish_test_finished(self, test):
+        """
+        Publish the errors of the given (run) test, and then its having finished.
+        """
+        for error in (test.errors or ()):
+            self.publish('error', suite=test.suite, test=test, error=error)
+        self.publish('test_finished', suite=test.suite, test=test)
+
+    def dispatch(self, event):
+        for subscriber in self.subscribers:
+            try:
+                subscriber.handle(event)
+            except Exception:  # A subscriber failing should not fail the run
+                log.exception('%r failed to handle %r', subscriber, event)
+
+    def dispatch_forever(self):
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                self.dispatch(event)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """
+        Wait until the subscribers have handled all the events published so far.
+        """
+        if self.queue:
+            self.queue.join()
+
+    def close(self):
+        """
+        Let the subscribers handle the rest of the events, and close them.
+        """
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = self.queue = None
+        for subscriber in self.subscribers:
+            subscriber.close()
+
+
+def get_default_bus():
+    """
+    Get an unthreaded bus printing a line per test (and error), for runners not given a bus.
+    """
+    return EventBus([LinePrinter()])
+
+
+class LinePrinter(Subscriber):
+    """
+    Prints a line for each test as it starts (or for tests run elsewhere, as it finishes), and for each error found.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.totals = {}
+        self.indexes = Counter()
+        self.started = set()
+
+    def write_line(self, line):
+        print(line, file=(self.stream or sys.stdout))
+
+    def on_suite_started(self, event):
+        self.totals[event.suite.name] = event.total
+        self.indexes[event.suite.name] = 0
+
+    def on_test_started(self, event):
+        self.started.add(event.test)
+        self.write_test_line(event.suite, event.test)
+
+    def on_error(self, event):
+        if event.test not in self.started:  # Announce it first
+            self.started.add(event.test)
+            self.write_test_line(event.suite, event.test)
+        self.write_line('[!] %s' % event.error)
+
+    def on_test_finished(self, event):
+        if event.test in self.started:
+            self.started.discard(event.test)
+        else:
+            self.write_test_line(event.suite, event.test)
+
+    def write_test_line(self, suite, test):
+        self.indexes[suite.name] += 1
+        self.write_line('{index}/{total}: {name}'.format(
+            index=self.indexes[suite.name],
+            total=self.totals.get(suite.name, '?'),
+            name=test.name,
+        ))
+
+
+class ProgressDisplay(Subscriber):
+    """
+    A rate-limited progress display: the number of tests run (of those planned), the throughput,
+    an estimate of the time left, and the number of errors found; plus the first `max_errors` errors.
+
+    On terminals, the display is redrawn in place at most every `interval` seconds;
+    otherwise, a line is written at most every `log_interval` seconds.
+    """
+
+    def __init__(self, stream=None, interval=0.25, log_interval=10, max_errors=20):
+        self.stream = (stream or sys.stderr)
+        self.live = self.stream.isatty()
+        self.interval = (interval if self.live else log_interval)
+        self.max_errors = max_errors
+        self.planned = Counter()  # suite name -> tests planned
+        self.finished = Counter()  # suite name -> tests finished
+        self.n_errors = 0
+        self.start_time = None
+        self.last_draw = 0
+        self.drawn = False
+
+    @property
+    def total(self):
+        return sum(self.planned.values())
+
+    @property
+    def done(self):
+        return sum(self.finished.values())
+
+    def on_suite_started(self, event):
+        if self.start_time is None:
+            self.start_time = event.time
+        self.planned[event.suite.name] += event.total
+
+    def on_error(self, event):
+        self.n_errors += 1
+        if self.n_errors <= self.max_errors:
+            self.write_line('[!] %s' % event.error)
+            if self.n_errors == self.max_errors:
+                self.write_line('[!] (further errors are only counted until the summary)')
+
+    def on_test_finished(self, event):
+        self.finished[event.suite.name] += 1
+        if event.time - self.last_draw >= self.interval:
+            self.draw()
+
+    def on_suite_finished(self, event):
+        name = event.suite.name
+        self.planned[name] = self.finished[name]  # Tests planned but not run (e.g. skipped) won't be coming
+        self.draw()
+        if self.live:
+            self.stream.write('\n')
+            self.drawn = False
+
+    def format(self, now):
+        elapsed = max(now - (self.start_time or now), 1e-9)
+        rate = self.done / elapsed
+        remaining = self.total - self.done
+        eta = ('%.0f s' % (remaining / rate) if rate else '?')
+        return '{done}/{total} tests; {rate:.1f} tests/s; ETA {eta}; {errors} errors'.format(
+            done=self.done,
+            total=self.total,
+            rate=rate,
+            eta=eta,
+            errors=self.n_errors,
+        )
+
+    def draw(self):
+        now = wallclock()
+        self.last_draw = now
+        if self.live:
+            self.stream.write('\r\x1b[K%s' % self.format(now))
+            self.drawn = True
+        else:
+            self.stream.write('%s\n' % self.format(now))
+        self.stream.flush()
+
+    def write_line(self, line):
+        if self.drawn:  # Clear the display; it is redrawn below the line at the next draw
+            self.stream.write('\r\x1b[K')
+            self.drawn = False
+        self.stream.write('%s\n' % line)
+        self.stream.flush()
@@ -3,8 +3,8 @@ A module of exceptions and problems.
 """
 import traceback
 
-from jinja2.filters import do_truncate
-from jsonschema import ValidationError as JSONSchemaValidationError
+from rv.instrumentation import counters
+from rv.utils import truncate
 
 
 class TestException(Exception):
@@ -21,6 +21,14 @@ class TestException(Exception):
             message = self.default_message
         super(TestException, self).__init__(message)
 
+    @property
+    def type_name(self):
+        """
+        Get the name of the type of this error (for reporting).
+        :return: str
+        """
+        return self.__class__.__name__
+
 
 class ParamValueError(TestException):
     """
@@ -32,16 +40,19 @@ class ParamValueError(TestException):
         'was not the expected {expected_value}'
     )
 
-    def __init__(self, test, item, item_value):
+    def __init__(self, test, item, item_value, param, expected_value):
         self.test = test
         self.item = item
         self.item_value = item_value
-        message = self.message_template.format(
-            expected_value=self.test.value,
-            item=self.item,
-            item_value=self.item_value,
-            param=self.test.param,
-        )
+        self.param = param
+        self.expected_value = expected_value
+        with counters.timer('error build'):
+            message = self.message_template.format(
+                expected_value=expected_value,
+                item=self.item,
+                item_value=self.item_value,
+                param=param,
+            )
         super(ParamValueError, self).__init__(test=test, message=message)
 
 
@@ -74,10 +85,100 @@ class ValidationException(TestException):
         self.item = item
         self.error = error
         if not message:
-            if isinstance(error, JSONSchemaValidationError):
-                error = error.message  # Avoid the huge "verbose" dump
-            message = '{error} (in {item})'.format(
-                error=error,
-                item=do_truncate(str(item), 40),
-            )
+            with counters.timer('error build'):
+                from jsonschema import ValidationError as JSONSchemaValidationError
+                if isinstance(error, JSONSchemaValidationError):
+                    error = error.message  # Avoid the huge "verbose" dump
+                message = '{error} (in {item})'.format(
+                    error=error,
+                    item=truncate(str(item), 40),
+                )
         super(ValidationException, self).__init__(test=test, message=message)
+
+
+class RecordedError(TestException):
+    """
+    An error that was recorded elsewhere (e.g. in a worker process) and reconstituted.
+
+    The original type name of the error is retained as `.type_name`.
+    """
+
+    def __init__(self, test, type_name, message):
+        self._type_name = type_name
+        super(RecordedError, self).__init__(test=test, message=message)
+
+    @property
+    def type_name(self):
+        return self._type_name
+
+
+class LatencyRegression(TestException):
+    """
+    Latencies got significantly worse compared to a baseline run.
+    """
+
+
+class CompletenessError(TestException):
+    """
+    The items returned were not the ones the baseline says should be returned.
+    """
+    message_template = '{count} {what} items: {ids}'
+    what = ''
+    max_ids = 10
+
+    def __init__(self, test, ids):
+        self.ids = ids
+        shown_ids = ', '.join(str(id) for id in sorted(ids, key=str)[:self.max_ids])
+        if len(ids) > self.max_ids:
+            shown_ids += ', ...'
+        message = self.message_template.format(count=len(ids), what=self.what, ids=shown_ids)
+        super(CompletenessError, self).__init__(test=test, message=message)
+
+
+class MissingItems(CompletenessError):
+    """
+    Items in the baseline matching the query were not returned.
+    """
+    what = 'missing'
+
+
+class UnexpectedItems(CompletenessError):
+    """
+    Items in the baseline not matching the query were returned.
+    """
+    what = 'unexpected'
+
+
+class WireEfficiencyError(TestException):
+    """
+    A response was larger, slower or less cacheable than the thresholds allow.
+    """
+
+
+class CachingError(TestException):
+    """
+    Conditional requests or cache validators did not work as HTTP caching requires.
+    """
+
+
+class LatencySLOViolation(TestException):
+    """
+    Latencies exceeded a declared service level objective.
+    """
+
+
+class Divergence(TestException):
+    """
+    A candidate endpoint's response differed from the reference endpoint's.
+    """
+
+
+class DivergentItems(Divergence, CompletenessError):
+    """
+    The items returned by a candidate endpoint differed from the ones the reference endpoint returned.
+    """
+    message_template = '{count} items {what}: {ids}'
+
+    def __init__(self, test, ids, what):
+        self.what = what
+        super(DivergentItems, self).__init__(test=test, ids=ids)
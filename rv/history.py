@@ -0,0 +1,146 @@
+"""
+A local store of the latency distributions of past runs, for cross-run comparisons.
+
+Each run is stored as a JSON file in the history directory, named by the run's ID
+(a timestamp, to the microsecond), and contains, per suite, the durations of each test and of each
+"query group" (tests involving a given query parameter, or of a given type),
+the kind of the samples of each query group, and the names of the tests that failed.
+
+The samples of a test are either its duration (sample kind `test`) or, when its request
+was repeated (see `rv.repeat`), the latencies of the repeated requests alone (kind `request`).
+"""
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+
+def get_query_groups(test):
+    """
+    Get the names of the query groups the given test belongs to.
+
+    :rtype: list[str]
+    """
+    groups = ['type:%s' % test.type]
+    groups.extend('param:%s' % parameter for parameter in sorted(test.query or ()))
+    return groups
+
+
+def get_latency_samples(suite):
+    """
+    Gather the latency samples (in seconds) of the tests in the given suite.
+
+    :return: dict with `tests` (test name to durations), `groups` (query group name to durations)
+             and `sample_kinds` (query group name to `test`, `request` or, if the group has both, `mixed`)
+    :rtype: dict[str, dict]
+    """
+    tests = defaultdict(list)
+    groups = defaultdict(list)
+    sample_kinds = {}
+    for test in suite.tests:
+        if test.duration is None:
+            continue
+        samples = (test.latency_samples or [test.duration])
+        kind = ('request' if test.latency_samples else 'test')
+        tests[test.name].extend(samples)
+        for group in get_query_groups(test):
+            groups[group].extend(samples)
+            sample_kinds[group] = (kind if sample_kinds.get(group, kind) == kind else 'mixed')
+    return {'tests': dict(tests), 'groups': dict(groups), 'sample_kinds': sample_kinds}
+
+
+def get_failures(suite):
+    """
+    Get the names of the tests in the given suite that found errors.
+
+    :rtype: list[str]
+    """
+    return sorted(test.name for test in suite.tests if test.errors)
+
+
+class HistoryStore(object):
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def list_runs(self):
+        """
+        List the IDs of the stored runs, oldest first.
+
+        :rtype: list[str]
+        """
+        return sorted(
+            filename[:-5]
+            for filename in os.listdir(self.path)
+            if filename.endswith('.json')
+        )
+
+    def save(self, suites):
+        """
+        Store the latency samples and failures of the given (run) suites.
+
+        :return: The ID of the stored run.
+        :rtype: str
+        """
+        now = datetime.now()
+        data = {
+            'id': now.strftime('%Y%m%dT%H%M%S.%f'),
+            'time': now.timestamp(),
+            'suites': {
+                suite.name: dict(get_latency_samples(suite), failures=get_failures(suite))
+                for suite in suites
+            },
+        }
+        temp_path = os.path.join(self.path, '.%s-%d.tmp' % (data['id'], os.getpid()))
+        with open(temp_path, 'x', encoding='utf-8') as fp:
+            json.dump(data, fp)
+        try:
+            return self.publish(temp_path, data['id'])
+        finally:
+            os.unlink(temp_path)
+
+    def publish(self, temp_path, run_id):
+        """
+        Link a written run file into the store under the given run ID; should a concurrent
+        run have taken that ID, under the first free one with a numeric suffix (`-1`, `-2`, ...).
+
+        :return: The ID the run was stored with.
+        :rtype: str
+        """
+        unique_id = run_id
+        for suffix in range(1, 100):
+            try:
+                os.link(temp_path, os.path.join(self.path, '%s.json' % unique_id))  # Fails if the file exists
+                return unique_id
+            except FileExistsError:
+                unique_id = '%s-%d' % (run_id, suffix)
+        raise FileExistsError('could not find a free run ID for %s in %s' % (run_id, self.path))
+
+    def load(self, run_id):
+        """
+        Load a stored run.
+
+        :param run_id: A run ID, or `latest` for the latest one.
+        :rtype: dict
+        """
+        if run_id == 'latest':
+            runs = self.list_runs()
+            if not runs:
+                raise LookupError('no runs in history %s' % self.path)
+            run_id = runs[-1]
+        return load_run(os.path.join(self.path, '%s.json' % run_id))
+
+    def load_recent(self, count):
+        """
+        Load the `count` latest stored runs, latest first.
+
+        :rtype: list[dict]
+        """
+        run_ids = (self.list_runs()[-count:] if count > 0 else [])
+        return [self.load(run_id) for run_id in reversed(run_ids)]
+
+
+def load_run(path):
+    with open(path, encoding='utf-8') as fp:
+        return json.load(fp)
@@ -0,0 +1,91 @@
+"""
+Lightweight, always-on counters for the validator's own hot paths.
+
+Usage::
+
+    with counters.timer('decode'):
+        ...
+
+The counters are summarized in the HTML report.
+"""
+import threading
+from time import perf_counter
+
+
+class Timer(object):
+    __slots__ = ('counters', 'name', 'start')
+
+    def __init__(self, counters, name):
+        self.counters = counters
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.counters.add(self.name, perf_counter() - self.start)
+
+
+class Counters(object):
+    """
+    A set of named (count, total time) counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def timer(self, name):
+        """
+        Get a context manager that adds the time spent within it to the named counter.
+        """
+        return Timer(self, name)
+
+    def add(self, name, duration, count=1):
+        with self.lock:
+            counter = self.data.get(name)
+            if counter is None:
+                counter = self.data[name] = [0, 0.0]
+            counter[0] += count
+            counter[1] += duration
+
+    def merge(self, snapshot):
+        """
+        Merge a snapshot (as returned by `snapshot`, e.g. from another process) into these counters.
+        """
+        for name, (count, duration) in snapshot.items():
+            self.add(name, duration, count=count)
+
+    def snapshot(self):
+        """
+        :return: dict of counter name to [count, total seconds]
+        :rtype: dict[str, list]
+        """
+        with self.lock:
+            return {name: list(counter) for (name, counter) in self.data.items()}
+
+    def reset(self):
+        with self.lock:
+            self.data.clear()
+
+    def get_summary(self):
+        """
+        Get a summary of the counters, for reporting.
+
+        :rtype: list[dict]
+        """
+        return [
+            {
+                'name': name,
+                'count': count,
+                'total': duration,
+                'mean': (duration / count if count else 0),
+            }
+            for (name, (count, duration))
+            in sorted(self.snapshot().items())
+        ]
+
+
+counters = Counters()
@@ -0,0 +1,213 @@
+"""
+Validation and latency metrics, exposed in the OpenMetrics text format.
+
+The metrics can be served over HTTP (for Prometheus et al. to scrape) and/or
+written to a text file (for e.g. the node exporter's textfile collector to pick up).
+"""
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rv.events import Subscriber
+from rv.instrumentation import counters
+
+log = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, escape_label_value(value)) for (name, value) in labels)
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def get_labels(self, labels):
+        return tuple(zip(self.labelnames, (labels[name] for name in self.labelnames)))
+
+    def render(self, openmetrics=True):
+        """
+        Render the metric family.
+
+        :param openmetrics: Whether to render in the OpenMetrics format (as opposed to the Prometheus text format,
+                            which names counter families by their sample names)
+        :rtype: Iterable[str]
+        """
+        family_name = self.get_family_name(openmetrics)
+        yield '# HELP %s %s' % (family_name, self.help)
+        yield '# TYPE %s %s' % (family_name, self.type)
+        for labels, value in sorted(self.values.items()):
+            yield from self.render_samples(labels, value)
+
+    def get_family_name(self, openmetrics):
+        return self.name
+
+    def render_samples(self, labels, value):  # pragma: no cover
+        raise NotImplementedError('implement me in a subclass')
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.get_labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """
+        Set the counter's value (for counters tracked elsewhere).
+        """
+        self.values[self.get_labels(labels)] = value
+
+    def get_family_name(self, openmetrics):
+        return (self.name if openmetrics else '%s_total' % self.name)
+
+    def render_samples(self, labels, value):
+        yield '%s_total%s %s' % (self.name, format_labels(labels), format_value(value))
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self.get_labels(labels)
+        if key not in self.values:
+            self.values[key] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+        data = self.values[key]
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                data['buckets'][i] += 1
+        data['count'] += 1
+        data['sum'] += value
+
+    def render_samples(self, labels, data):
+        for upper_bound, count in zip(self.buckets, data['buckets']):
+            bucket_labels = labels + (('le', format_value(float(upper_bound))),)
+            yield '%s_bucket%s %d' % (self.name, format_labels(bucket_labels), count)
+        yield '%s_count%s %d' % (self.name, format_labels(labels), data['count'])
+        yield '%s_sum%s %s' % (self.name, format_labels(labels), format_value(data['sum']))
+
+
+class ValidationMetrics(Subscriber):
+    """
+    The metrics of a validation run (or of a long-running process); they subscribe to its `test_finished` events.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tests = Counter('rv_tests', 'Tests run', ('suite', 'type'))
+        self.failures = Counter('rv_test_failures', 'Tests run with errors', ('suite', 'type'))
+        self.errors = Counter('rv_test_errors', 'Errors found by tests', ('suite', 'type'))
+        self.request_duration = Histogram(
+            'rv_request_duration_seconds',
+            'Duration of the requests made by tests, by query parameter',
+            ('suite', 'parameter'),
+        )
+        self.response_bytes = Counter('rv_response_bytes', 'Bytes received in responses', ('suite',))
+        self.hot_path_seconds = Counter('rv_hot_path_seconds', 'Time spent in the validator\'s hot paths', ('path',))
+        self.hot_path_calls = Counter('rv_hot_path_calls', 'Calls of the validator\'s hot paths', ('path',))
+
+    def on_test_finished(self, event):
+        self.observe_test(event.test)
+
+    def observe_test(self, test):
+        """
+        Update the metrics with the given (run) test.
+        """
+        suite = test.suite.name
+        with self.lock:
+            self.tests.inc(suite=suite, type=test.type)
+            if test.errors:
+                self.failures.inc(suite=suite, type=test.type)
+                self.errors.inc(len(test.errors), suite=suite, type=test.type)
+            if test.request_duration is not None:
+                for parameter in (sorted(test.query) if test.query else ('',)):
+                    self.request_duration.observe(test.request_duration, suite=suite, parameter=parameter)
+            if test.response_bytes:
+                self.response_bytes.inc(test.response_bytes, suite=suite)
+
+    def render(self, openmetrics=True):
+        """
+        Render all metrics.
+
+        :param openmetrics: OpenMetrics (True) or Prometheus text format (False)
+        :rtype: str
+        """
+        with self.lock:
+            for counter in counters.get_summary():
+                self.hot_path_seconds.set(counter['total'], path=counter['name'])
+                self.hot_path_calls.set(counter['count'], path=counter['name'])
+            lines = []
+            for metric in (
+                self.tests,
+                self.failures,
+                self.errors,
+                self.request_duration,
+                self.response_bytes,
+                self.hot_path_seconds,
+                self.hot_path_calls,
+            ):
+                lines.extend(metric.render(openmetrics=openmetrics))
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """
+        Atomically write the metrics (in the Prometheus text format the node exporter expects) to a file.
+        """
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp_path, 'w', encoding='utf-8') as fp:
+            fp.write(self.render(openmetrics=False))
+        os.replace(temp_path, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Serve the metrics over HTTP (at any path) in a background thread.
+
+        :return: The server; call `.shutdown()` to stop it.
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                log.debug(format, *args)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        log.info('serving metrics on http://%s:%d/metrics', *server.server_address)
+        return server
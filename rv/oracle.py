@@ -0,0 +1,195 @@
+"""
+An index over the baseline items, for working out which items a query is expected to return.
+
+Discrete-valued (`eq`) Params are indexed with hash maps of value to item positions,
+and ordered (`ge`, `gt`, `le`, `lt`) Params with sorted value arrays searched with `bisect`.
+Params with other operators fall back to a linear scan.
+"""
+from bisect import bisect_left, bisect_right
+from operator import eq, ge, gt, le, lt
+
+MISSING = object()
+
+
+class DiscreteIndex(object):
+
+    def __init__(self, values):
+        self.positions = {}
+        for position, value in enumerate(values):
+            if value is not MISSING:
+                self.positions.setdefault(value, []).append(position)
+
+    def find(self, constraints):
+        """
+        :param constraints: list of (operator, value) tuples (all `eq`)
+        """
+        values = {value for (operator, value) in constraints}
+        if len(values) > 1:
+            return ()
+        return self.positions.get(values.pop(), ())
+
+    def count(self, constraints):
+        return len(self.find(constraints))
+
+
+class OrderedIndex(object):
+
+    def __init__(self, values):
+        pairs = sorted(
+            ((value, position) for (position, value) in enumerate(values) if value is not MISSING),
+            key=lambda pair: pair[0],
+        )
+        self.values = [value for (value, position) in pairs]
+        self.positions = [position for (value, position) in pairs]
+
+    def get_bounds(self, constraints):
+        """
+        Get the bounds of the slice of sorted positions satisfying all of the given constraints.
+
+        :param constraints: list of (operator, value) tuples
+        """
+        start = 0
+        end = len(self.values)
+        for operator, value in constraints:
+            if operator is ge:
+                start = max(start, bisect_left(self.values, value))
+            elif operator is gt:
+                start = max(start, bisect_right(self.values, value))
+            elif operator is le:
+                end = min(end, bisect_right(self.values, value))
+            else:  # lt
+                end = min(end, bisect_left(self.values, value))
+        return (start, max(start, end))
+
+    def find(self, constraints):
+        start, end = self.get_bounds(constraints)
+        return self.positions[start:end]
+
+    def count(self, constraints):
+        start, end = self.get_bounds(constraints)
+        return end - start
+
+
+class ScanIndex(object):
+
+    def __init__(self, values):
+        self.values = values
+
+    def find(self, constraints):
+        return [
+            position for (position, item_value) in enumerate(self.values)
+            if item_value is not MISSING and all(operator(item_value, value) for (operator, value) in constraints)
+        ]
+
+    def count(self, constraints):
+        return len(self.find(constraints))
+
+
+class BaselineIndex(object):
+    """
+    Index the given baseline items by the given Params.
+    """
+    ordered_operators = (ge, gt, le, lt)
+
+    def __init__(self, items, parameters, id_property):
+        """
+        :param items: Baseline items
+        :param parameters: Params to index
+        :param id_property: The property identifying items
+        """
+        self.id_property = id_property
+        self.ids = [item.get(id_property) for item in items]
+        self.id_to_position = {id: position for (position, id) in enumerate(self.ids)}
+        self.values = {}
+        self.indexes = {}
+        parsed = {}  # Params sharing a property and type share values...
+        built = {}  # ... and indexes, if they're of the same kind
+        for param in parameters:
+            if param.operator is eq:
+                index_class = DiscreteIndex
+            elif param.operator in self.ordered_operators:
+                index_class = OrderedIndex
+            else:
+                index_class = ScanIndex
+            key = (param.property, param.__class__)
+            if key not in parsed:
+                parsed[key] = [
+                    (param.get_value(item) if param.property in item else MISSING)
+                    for item in items
+                ]
+            if key + (index_class,) not in built:
+                built[key + (index_class,)] = index_class(parsed[key])
+            self.values[param] = parsed[key]
+            self.indexes[param] = built[key + (index_class,)]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        return id in self.id_to_position
+
+    def position_matches(self, position, params_to_values):
+        """
+        Does the baseline item at the given position match all of the given params?
+        """
+        for param, value in params_to_values.items():
+            item_value = self.values[param][position]
+            if item_value is MISSING or not param.operator(item_value, value):
+                return False
+        return True
+
+    def matches(self, id, params_to_values):
+        """
+        Does the baseline item with the given ID match all of the given params?
+
+        :return: True/False, or None if the item is not in the baseline
+        """
+        position = self.id_to_position.get(id)
+        if position is None:
+            return None
+        return self.position_matches(position, params_to_values)
+
+    def get_constraints(self, params_to_values):
+        """
+        Group the given params' constraints by the index answering them
+        (so e.g. a range on a single property is looked up at once).
+
+        :return: list of (index, list of (operator, value)) tuples
+        """
+        constraints = {}
+        for param, value in params_to_values.items():
+            constraints.setdefault(self.indexes[param], []).append((param.operator, value))
+        return list(constraints.items())
+
+    def count(self, params_to_values):
+        """
+        Count the baseline items matching all of the given params.
+
+        If all params are answered by a single index (e.g. a single param, or a range on one property),
+        this does not need to look at the items at all.
+        """
+        constraints = self.get_constraints(params_to_values)
+        if len(constraints) == 1:
+            ((index, index_constraints),) = constraints
+            return index.count(index_constraints)
+        return len(self.find(params_to_values))
+
+    def find(self, params_to_values):
+        """
+        Find the IDs of the baseline items matching all of the given params.
+
+        The candidates are looked up from the most selective index and filtered by the rest of the params.
+
+        :rtype: list
+        """
+        if not params_to_values:
+            return list(self.ids)
+        index, index_constraints = min(
+            self.get_constraints(params_to_values),
+            key=lambda pair: pair[0].count(pair[1]),
+        )
+        return [
+            self.ids[position]
+            for position in index.find(index_constraints)
+            if self.position_matches(position, params_to_values)
+        ]
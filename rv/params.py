@@ -1,8 +1,17 @@
-import datetime
 import random
 from operator import eq
 
-import dateutil.parser
+
+def sort_values(values):
+    """
+    Sort the given values, by their string representations if they're not mutually orderable.
+
+    :rtype: list
+    """
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)
 
 
 class Param(object):
@@ -11,7 +20,7 @@ class Param(object):
     parameter of some sort.
     """
 
-    def __init__(self, *, property, parameter=None, operator=eq, bucket=None, discrete=True):
+    def __init__(self, *, property, parameter=None, operator=eq, bucket=None, discrete=True, slo=None):
         """
 
         :param property: Property name on retrieved objects
@@ -20,7 +29,9 @@ class Param(object):
         :param bucket: A bucketing function. (See `embucket`).
         :param discrete: Whether or not this parameter is discrete-valued.
                          Continuous-valued parameters (as opposed to `discrete` ones)
-                         may have values randomly generated instead of picked out of the baseline.
+                         have values picked at quantiles of the baseline distribution
+                         instead of (a random sample of) all distinct values.
+        :param slo: A `rv.slo.LatencySLO` for the tests involving this parameter.
         """
         assert property
         self.property = property
@@ -28,6 +39,7 @@ class Param(object):
         self.operator = operator
         self.bucket_value = bucket
         self.discrete = discrete
+        self.slo = slo
 
     def __repr__(self):
         return '<%s(%r) at 0x%x>' % (self.__class__.__name__, self.parameter, id(self))
@@ -58,17 +70,19 @@ class Param(object):
         """
         Embucket the given values based on the Param's bucketing function.
 
-        For all buckets the bucketing function returns, only one input value is retained.
+        For all buckets the bucketing function returns, only the lowest input value
+        (the bucket's lower boundary) is retained.
 
         :param values: Input values
-        :return: Output values
+        :return: Output values, sorted
+        :rtype: list
         """
         if not self.bucket_value:
             return values
         bucketed = {}
-        for value in values:
-            bucketed[self.bucket_value(value)] = value
-        return set(bucketed.values())
+        for value in sort_values(values):
+            bucketed.setdefault(self.bucket_value(value), value)
+        return list(bucketed.values())
 
     def to_wire(self, value):
         """
@@ -86,24 +100,68 @@ class Param(object):
         """
         return value
 
+    def dump_value(self, value):
+        """
+        Return a JSON-serializable representation of the given Python value.
+
+        Values read from the baseline are JSON-native by default, so they're passed as-is.
+        The inverse of `load_value`.
+        """
+        return value
+
+    def load_value(self, value):
+        """
+        Return a Python value from a representation returned by `dump_value`.
+
+        The inverse of `dump_value`.
+        """
+        return value
+
     def generate_values(self, value_range, count=None):
         """
-        Generate at most `count` values from the range `range`.
+        Generate at most `count` distinct values from the range `range`.
 
         For discrete values, this generates either the full value range,
         or a random sample thereof.
 
-        For continuous values, a random sampling is likely to be used, and
-        as such, duplicate values could well be returned.
+        For continuous values, `value_range` is a sorted sample of the baseline distribution
+        (see `ListTester.baseline_samples`), and the values are picked deterministically:
+        the edges (min and max), then the values at `count - 2` evenly stratified quantiles,
+        moved to the boundary of their bucket if the Param has a bucketing function.
+        Dense regions of the distribution thus get more of the values than sparse ones.
 
         :rtype: Iterable[object]
         """
-
-        if count:
+        if not self.discrete:
+            yield from self.generate_quantile_values(value_range, count)
+        elif count:
             yield from sorted(random.sample(value_range, min(len(value_range), count)))
         else:
             yield from value_range
 
+    def generate_quantile_values(self, sample, count=None):
+        """
+        Pick at most `count` distinct values from a sorted sample at stratified quantiles; see `generate_values`.
+        """
+        if not sample:
+            return
+        n = len(sample)
+        if count:
+            n_strata = max(count - 2, 0)
+            quantile_positions = [int((i + 0.5) * n / n_strata) for i in range(n_strata)]
+        else:
+            quantile_positions = range(n)
+        boundaries = {}
+        if self.bucket_value:
+            for value in sample:
+                boundaries.setdefault(self.bucket_value(value), value)
+        values = [sample[0], sample[-1]]
+        for position in quantile_positions:
+            value = sample[position]
+            values.append(boundaries.get(self.bucket_value(value), value) if boundaries else value)
+        picked = list(dict.fromkeys(values))  # Deduplicated, in order of priority
+        yield from sorted(picked[:count] if count else picked)
+
 
 class DateTimeParam(Param):
     """
@@ -114,16 +172,14 @@ class DateTimeParam(Param):
         return value.isoformat()
 
     def to_python(self, value):
+        import dateutil.parser  # Imported lazily, for startup speed
         return dateutil.parser.parse(value)
 
-    def generate_values(self, value_range, count=None):
-        min_val = min(value_range)
-        max_val = max(value_range)
-        total_delta = (max_val - min_val).total_seconds()
-        n = 0
-        while not count or n < count:
-            yield min_val + datetime.timedelta(seconds=random.uniform(0, total_delta))
-            n += 1
+    def dump_value(self, value):
+        return self.to_wire(value)
+
+    def load_value(self, value):
+        return self.to_python(value)
 
 
 class NumberParam(Param):
@@ -133,11 +189,3 @@ class NumberParam(Param):
 
     def to_python(self, value):
         return float(value)
-
-    def generate_values(self, value_range, count=None):
-        min_val = min(value_range)
-        max_val = max(value_range)
-        n = 0
-        while not count or n < count:
-            yield random.uniform(min_val, max_val)
-            n += 1
@@ -0,0 +1,152 @@
+"""
+Profiling the validator itself.
+
+The available modes are
+
+* `cprofile`: a cProfile dump (`.prof`, see `pstats`) per suite
+  (or for runners interleaving the suites' tests, such as watch mode, for the whole run)
+* `sample`: wall-clock stack samples of the main thread, written in the
+  "collapsed" format understood by flamegraph.pl, speedscope et al.
+* `tracemalloc`: the peak memory use of each test (shown in the report, too),
+  and the top allocation sites
+"""
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample', 'tracemalloc')
+
+
+def slugify(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('_')
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of a thread at an interval.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        super(StackSampler, self).__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s:%s' % (frame.f_globals.get('__name__', '?'), code.co_name))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def write(self, fp):
+        for stack, count in self.stacks.most_common():
+            fp.write('%s %d\n' % (stack, count))
+
+
+class Profiler(object):
+    """
+    Profiles a run in the given modes, writing the artifacts into a directory.
+
+    With no modes, all methods are no-ops.
+    """
+
+    def __init__(self, modes=(), directory='.', prefix='rv-profile'):
+        unknown_modes = set(modes) - set(PROFILE_MODES)
+        if unknown_modes:
+            raise ValueError('unknown profile modes: %s' % ', '.join(sorted(unknown_modes)))
+        self.modes = set(modes)
+        self.directory = directory
+        self.prefix = prefix
+        self.sampler = None
+        self.artifacts = []
+
+    def get_path(self, suffix):
+        path = os.path.join(self.directory, '%s-%s' % (self.prefix, suffix))
+        self.artifacts.append(path)
+        return path
+
+    def start(self, suites):
+        """
+        Start profiling.
+
+        :param suites: The suites to be run.
+        """
+        if 'sample' in self.modes:
+            self.sampler = StackSampler(threading.get_ident())
+            self.sampler.start()
+        if 'tracemalloc' in self.modes:
+            tracemalloc.start()
+            for suite in suites:
+                suite.trace_memory = True
+
+    @contextmanager
+    def profile(self, name):
+        """
+        Profile the code run within this context (if in `cprofile` mode), dumping the profile by the given name.
+        """
+        if 'cprofile' not in self.modes:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(self.get_path('%s.prof' % slugify(name)))
+
+    def profile_suite(self, suite):
+        """
+        Profile the suite being run within this context (if in `cprofile` mode).
+        """
+        return self.profile(suite.name)
+
+    def stop(self, suites):
+        """
+        Stop profiling and write the remaining artifacts.
+
+        :param suites: The suites that were run.
+        """
+        if self.sampler:
+            self.sampler.stop()
+            with open(self.get_path('stacks.txt'), 'w', encoding='utf-8') as fp:
+                self.sampler.write(fp)
+        if tracemalloc.is_tracing() and 'tracemalloc' in self.modes:
+            self.write_memory_stats(suites, tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        for path in self.artifacts:
+            log.info('wrote profile %s', path)
+
+    def write_memory_stats(self, suites, snapshot):
+        with open(self.get_path('memory.tsv'), 'w', encoding='utf-8') as fp:
+            fp.write('suite\ttest\tpeak_bytes\n')
+            peaks = [
+                (test.memory_peak, suite.name, test.name)
+                for suite in suites
+                for test in suite.tests
+                if test.memory_peak is not None
+            ]
+            for peak, suite_name, test_name in sorted(peaks, reverse=True):
+                fp.write('%s\t%s\t%d\n' % (suite_name, test_name, peak))
+        with open(self.get_path('allocations.txt'), 'w', encoding='utf-8') as fp:
+            for stat in snapshot.statistics('lineno')[:50]:
+                fp.write('%s\n' % stat)
@@ -0,0 +1,172 @@
+"""
+Validator discovery, with a cached registry.
+
+Validators may be registered by installed packages as entry points in the
+`rv.validators` group, e.g. in a `setup.py`::
+
+    entry_points={
+        'rv.validators': ['issue-reporting = examples.issue_reporting:IssueReportingValidator'],
+    }
+
+after which they're runnable as `python -m rv issue-reporting`.  Validators may
+also be named by a dotted module or class path (see `rv.utils.find_class`).
+
+Scanning the installed distributions for entry points is slow, as is scanning modules
+for validator classes, so the results are cached in a JSON file (by default in
+`~/.cache/rv/validators.json`, or `$RV_CACHE_DIR`), which is invalidated whenever
+packages are installed or removed.  As module paths resolve differently depending on
+the working directory and the import path, names resolved to classes are cached per those.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+from importlib.metadata import entry_points
+
+from rv.utils import find_class
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'rv.validators'
+CACHE_VERSION = 2
+MAX_RESOLUTION_CONTEXTS = 20  # The number of working directory/import path combinations to cache names for
+
+
+def get_cache_path():
+    cache_dir = os.environ.get('RV_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'rv')
+    return os.path.join(cache_dir, 'validators.json')
+
+
+def get_fingerprint():
+    """
+    Get a fingerprint of the package directories on the import path;
+    installing or removing packages changes it.
+
+    :rtype: list
+    """
+    fingerprint = []
+    for path in sys.path:
+        if os.path.basename(path) not in ('site-packages', 'dist-packages'):
+            continue
+        try:
+            fingerprint.append([path, os.stat(path).st_mtime])
+        except OSError:
+            continue
+    return fingerprint
+
+
+def get_resolution_context():
+    """
+    Get a key for the working directory and import path, which module paths are resolved against.
+
+    :rtype: str
+    """
+    return hashlib.sha1(json.dumps([os.getcwd(), sys.path]).encode('utf-8')).hexdigest()
+
+
+def discover_entry_points(group=ENTRY_POINT_GROUP):
+    """
+    :return: dict of entry point name to `module:attribute` string
+    :rtype: dict[str, str]
+    """
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:  # Python < 3.10
+        eps = eps.get(group, ())
+    return {ep.name: ep.value for ep in eps}
+
+
+def load_classpath(classpath):
+    """
+    Load an object from a `module:attribute` string.
+    """
+    module_name, _, attribute = classpath.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ValidatorRegistry(object):
+    """
+    A cached mapping of validator names to `module:Class` paths.
+    """
+
+    def __init__(self, base_class, cache_path=None):
+        """
+        :param base_class: The base class validators must subclass
+        :param cache_path: Path of the cache file; see `get_cache_path`
+        """
+        self.base_class = base_class
+        self.cache_path = (cache_path or get_cache_path())
+        self._data = None
+
+    @property
+    def data(self):
+        """
+        The registry data: `entry_points` (entry point names to class paths) and
+        `resolved` (other names, e.g. module paths, previously resolved to class paths,
+        keyed by `get_resolution_context`).
+        """
+        if self._data is None:
+            self._data = self._load_cache()
+            if self._data is None:
+                self._data = {'entry_points': discover_entry_points(), 'resolved': {}}
+                self._save_cache()
+        return self._data
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if data.pop('version', None) != CACHE_VERSION or data.pop('fingerprint', None) != get_fingerprint():
+            return None
+        return data
+
+    def _save_cache(self):
+        data = dict(self._data, version=CACHE_VERSION, fingerprint=get_fingerprint())
+        temp_path = '%s.%d.tmp' % (self.cache_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as fp:
+                json.dump(data, fp)
+            os.replace(temp_path, self.cache_path)
+        except OSError as exc:  # Not being able to cache is no reason to fail
+            log.debug('could not write validator registry cache %s: %s', self.cache_path, exc)
+
+    def names(self):
+        """
+        Get the names of the validators registered as entry points.
+
+        :rtype: list[str]
+        """
+        return sorted(self.data['entry_points'])
+
+    def get(self, name):
+        """
+        Get the validator class by the given name (an entry point name or a module/class path).
+
+        :rtype: type
+        """
+        context = get_resolution_context()
+        classpath = self.data['entry_points'].get(name) or self.data['resolved'].get(context, {}).get(name)
+        if classpath:
+            try:
+                cls = load_classpath(classpath)
+                if isinstance(cls, type) and issubclass(cls, self.base_class):
+                    return cls
+            except (ImportError, AttributeError) as exc:
+                log.debug('stale registry entry %s=%s: %s', name, classpath, exc)
+        cls = find_class(name, self.base_class)
+        if cls is None:
+            raise LookupError('no validator found in %s' % name)
+        resolved = self.data['resolved']
+        classpaths = resolved.pop(context, {})  # Reinserted, so the contexts stay in order of last update
+        classpaths[name] = '%s:%s' % (cls.__module__, cls.__name__)
+        resolved[context] = classpaths
+        for stale_context in list(resolved)[:-MAX_RESOLUTION_CONTEXTS]:  # The least recently updated ones
+            del resolved[stale_context]
+        self._save_cache()
+        return cls
@@ -0,0 +1,42 @@
+"""
+Repeated latency measurements.
+
+By default, each test runs (and so makes its request) once, and its latency is a single sample
+that includes e.g. cold caches.  With a `Repetition`, each test's request is re-issued after the
+test has run (and checked the response): `warmup` times, discarding the latencies, and `repeat` times,
+recording them.  The responses of the repeated requests are not checked.
+"""
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class Repetition(object):
+
+    def __init__(self, *, repeat, warmup=0):
+        """
+        :param repeat: The number of latency samples to record for each test.
+        :param warmup: The number of requests to make (and discard the latencies of) before recording.
+        """
+        self.repeat = repeat
+        self.warmup = warmup
+
+    @property
+    def num_requests(self):
+        """
+        The number of requests `measure` makes for a repeatable test.
+        """
+        return self.warmup + self.repeat
+
+    def measure(self, test):
+        """
+        Re-issue the test's request, if it has one (see `Test.time_request`).
+
+        :return: The recorded latencies in seconds, or None if the test's request can't be re-issued.
+        :rtype: list[float]|None
+        """
+        if not test.repeatable:
+            return None
+        for i in range(self.warmup):
+            test.time_request()
+        return [test.time_request() for i in range(self.repeat)]
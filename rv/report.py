@@ -1,18 +1,31 @@
 import os
 from operator import attrgetter
 
-import jinja2
+from rv.instrumentation import counters
 
 TEMPLATE_PATH = os.path.join(
     os.path.dirname(__file__),
     'templates'
 )
 
-jinja_env = jinja2.Environment(
-    loader=jinja2.FileSystemLoader([TEMPLATE_PATH]),
-    autoescape=True,
-    undefined=jinja2.DebugUndefined,
-)
+_jinja_env = None
+
+
+def get_jinja_env():
+    """
+    Get the Jinja environment for reports.
+
+    It (and Jinja itself) is only loaded when first needed, so as not to slow down startup.
+    """
+    global _jinja_env
+    if _jinja_env is None:
+        import jinja2
+        _jinja_env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader([TEMPLATE_PATH]),
+            autoescape=True,
+            undefined=jinja2.DebugUndefined,
+        )
+    return _jinja_env
 
 
 class HTMLReportWriter(object):
@@ -21,8 +34,10 @@ class HTMLReportWriter(object):
         self.suites = list(sorted(suites, key=attrgetter('name')))
 
     def render(self):
-        template = jinja_env.get_template('report.html')
-        return template.render({
-            'title': 'RV Report',
-            'suites': self.suites,
-        })
+        with counters.timer('render'):
+            template = get_jinja_env().get_template('report.html')
+            return template.render({
+                'title': 'RV Report',
+                'suites': self.suites,
+                'counters': counters.get_summary(),
+            })
@@ -0,0 +1,195 @@
+"""
+Streaming result writers (and readers).
+
+The writers append a record per test the moment it has been run, and flush
+after each one, so the output is usable while the run is in progress and
+survives the validator crashing mid-run.  Nothing is retained per test, so
+memory use stays constant however long the run is.
+"""
+import json
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+from rv.events import Subscriber
+from rv.suites.recorded import RecordedSuite
+from rv.tests.recorded import RecordedTest
+
+
+class ResultWriter(Subscriber):
+    """
+    Base class for streaming result writers; they subscribe to the `test_finished` events of a run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fp = open(path, 'w', encoding='utf-8')
+        self.seen_suites = set()
+
+    def write_test(self, test):
+        """
+        Write a record of the given (run) test.
+        """
+        suite = test.suite
+        if suite.name not in self.seen_suites:
+            self.seen_suites.add(suite.name)
+            self.write_suite(suite)
+        self.write_record(test)
+        self.fp.flush()
+
+    def on_test_finished(self, event):
+        self.write_test(event.test)
+
+    def write_suite(self, suite):
+        pass
+
+    def write_record(self, test):  # pragma: no cover
+        raise NotImplementedError('implement me in a subclass')
+
+    def close(self):
+        self.fp.flush()
+        os.fsync(self.fp.fileno())
+        self.fp.close()
+
+
+class JSONLResultWriter(ResultWriter):
+    """
+    Writes JSON Lines; a `suite` record for each suite (before its first test), and a `test` record for each test.
+    """
+
+    def write_suite(self, suite):
+        self.write_line({
+            'record': 'suite',
+            'name': suite.name,
+            'description': suite.description,
+            'detail': suite.get_report_detail(),
+        })
+
+    def write_record(self, test):
+        record = test.get_record()
+        record.update(
+            record='test',
+            suite=test.suite.name,
+            status=('failed' if test.errors else 'passed'),
+        )
+        self.write_line(record)
+
+    def write_line(self, record):
+        self.fp.write(json.dumps(record, default=str, sort_keys=True) + '\n')
+
+
+class JUnitResultWriter(ResultWriter):
+    """
+    Writes JUnit-style XML, a `testcase` at a time.
+
+    The closing tag is only written when the writer is closed; `read_junit` copes with files lacking it.
+    """
+
+    def __init__(self, path):
+        super(JUnitResultWriter, self).__init__(path)
+        self.fp.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuite name="rv">\n')
+        self.fp.flush()
+
+    def write_record(self, test):
+        record = test.get_record()
+        self.fp.write('  <testcase classname=%s name=%s time="%.6f">\n' % (
+            quoteattr(test.suite.name),
+            quoteattr(record['name']),
+            record['duration'] or 0,
+        ))
+        for error in record['errors']:
+            self.fp.write('    <failure type=%s message=%s />\n' % (
+                quoteattr(error['type']),
+                quoteattr(error['message']),
+            ))
+        properties = dict(record['detail'], url=record['url'], type=record['type'])
+        self.fp.write('    <properties>\n')
+        for key, value in sorted(properties.items()):
+            self.fp.write('      <property name=%s value=%s />\n' % (quoteattr(key), quoteattr(str(value))))
+        self.fp.write('    </properties>\n')
+        if record['query']:
+            self.fp.write('    <system-out>%s</system-out>\n' % escape(json.dumps(record['query'], sort_keys=True)))
+        self.fp.write('  </testcase>\n')
+
+    def close(self):
+        self.fp.write('</testsuite>\n')
+        super(JUnitResultWriter, self).close()
+
+
+def read_jsonl(fp):
+    """
+    Read suite and test records from a JSON Lines result file.
+
+    A truncated last line (as left by a crash) is ignored.
+
+    :rtype: Iterable[dict]
+    """
+    for line in fp:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def read_junit(fp):
+    """
+    Read test records from a JUnit-style XML result file written by `JUnitResultWriter`.
+
+    :rtype: Iterable[dict]
+    """
+    content = fp.read()
+    if '</testsuite>' not in content:  # Unterminated; the run probably crashed.
+        end = content.rfind('</testcase>')
+        if end >= 0:
+            end += len('</testcase>')
+        else:  # No test was written; close the root element right after its start tag
+            end = content.find('>', content.find('<testsuite'))
+            if '<testsuite' not in content or end < 0:
+                return
+            end += 1
+        content = content[:end] + '</testsuite>'
+    for testcase in ET.fromstring(content).iter('testcase'):
+        properties = {prop.get('name'): prop.get('value') for prop in testcase.iter('property')}
+        system_out = testcase.findtext('system-out')
+        yield {
+            'record': 'test',
+            'suite': testcase.get('classname'),
+            'name': testcase.get('name'),
+            'type': properties.pop('type', ''),
+            'url': properties.pop('url', ''),
+            'duration': float(testcase.get('time')),
+            'query': (json.loads(system_out) if system_out else None),
+            'detail': properties,
+            'errors': [
+                {'type': failure.get('type'), 'message': failure.get('message')}
+                for failure in testcase.iter('failure')
+            ],
+        }
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as fp:
+        reader = (read_junit if path.endswith('.xml') else read_jsonl)
+        yield from reader(fp)
+
+
+def merge_results(paths):
+    """
+    Merge the records in the given result files into suites of recorded tests.
+
+    :param paths: JSON Lines (or `.xml` JUnit) file paths.
+    :rtype: list[RecordedSuite]
+    """
+    suites = {}
+    for path in paths:
+        for record in read_records(path):
+            name = record.get('suite') or record.get('name')
+            if name not in suites:
+                suites[name] = RecordedSuite(name=name)
+            suite = suites[name]
+            if record.get('record') == 'suite':
+                suite.description = record.get('description') or suite.description
+                suite.detail.update(record.get('detail') or {})
+            else:
+                suite.add_test(RecordedTest(suite=suite, record=record))
+    return list(suites.values())
@@ -0,0 +1,137 @@
+"""
+Statistical sampling of the items of large responses for per-item checks.
+
+Checking every item of a response with thousands of near-identical items buys little
+over checking a random sample of them: if a fraction `f` of the items were bad, a sample
+of `n` items would include at least one bad item with probability `1 - (1 - f) ** n`,
+regardless of how many items there are.  (For finite responses, fewer items suffice.)
+"""
+import math
+from itertools import islice
+
+from rv.utils import get_random
+
+
+class SamplingPolicy(object):
+
+    def __init__(self, *, full_below=500, detection_probability=0.99, min_defect_rate=0.01, seed=None):
+        """
+        :param full_below: Responses with fewer items than this are checked in full.
+        :param detection_probability: The probability with which a sample should include
+                                      at least one bad item, if at least `min_defect_rate` of the items are bad.
+        :param min_defect_rate: The smallest fraction of bad items to detect.
+        :param seed: A seed for picking the samples. By default, drawn from the global RNG (see `--seed`).
+        """
+        assert 0 < detection_probability < 1
+        assert 0 < min_defect_rate < 1
+        self.full_below = int(full_below)
+        self.detection_probability = float(detection_probability)
+        self.min_defect_rate = float(min_defect_rate)
+        self.random = get_random(seed)
+
+    def __str__(self):
+        return 'full below %d items; %g%% probability of detecting a %g%% defect rate' % (
+            self.full_below,
+            self.detection_probability * 100,
+            self.min_defect_rate * 100,
+        )
+
+    def iter_miss_probabilities(self, n_items):
+        """
+        Generate the (hypergeometric) probabilities that the first 1, 2, ... `n_items` random items checked
+        are all good, if a fraction of `min_defect_rate` of the items are bad.
+        """
+        n_bad = int(math.ceil(self.min_defect_rate * n_items))
+        p_miss = 1.0
+        for i in range(n_items):
+            p_miss *= max(0, n_items - n_bad - i) / (n_items - i)
+            yield p_miss
+
+    def get_sample_size(self, n_items):
+        """
+        Get the number of items to check of a response of `n_items` items.
+
+        :rtype: int
+        """
+        if n_items < self.full_below:
+            return n_items
+        for n_checked, p_miss in enumerate(self.iter_miss_probabilities(n_items), 1):
+            if 1 - p_miss >= self.detection_probability:
+                return n_checked
+        return n_items
+
+    def get_confidence(self, n_checked, n_items):
+        """
+        Get the probability that checking `n_checked` random items out of `n_items` would have
+        included at least one bad item, if a fraction of `min_defect_rate` of them were bad.
+        """
+        if not n_checked:
+            return 0.0
+        for p_miss in islice(self.iter_miss_probabilities(n_items), n_checked - 1, None):
+            return 1 - p_miss
+        return 1.0
+
+
+class ItemSample(object):
+    """
+    Checks the items of a response, or a sample thereof, escalating to checking
+    all of the items as soon as a bad item turns up.
+    """
+
+    def __init__(self, policy, items):
+        """
+        :param policy: A SamplingPolicy, or None to check all items
+        :param items: The items
+        """
+        self.policy = policy
+        self.items = items
+        self.num_checked = 0
+        self.escalated = False
+        if policy:
+            size = policy.get_sample_size(len(items))
+            self.positions = sorted(policy.random.sample(range(len(items)), size))
+        else:
+            self.positions = range(len(items))
+
+    @property
+    def is_sampled(self):
+        return len(self.positions) < len(self.items)
+
+    def iter_errors(self, check):
+        """
+        Check the items.
+
+        :param check: A callable returning a list of errors for an item
+        :return: Iterable of errors
+        """
+        for index, position in enumerate(self.positions):
+            errors = check(self.items[position])
+            self.num_checked += 1
+            yield from errors
+            if errors and self.is_sampled:
+                self.escalated = True
+                break
+        if self.escalated:
+            checked = set(self.positions[:index + 1])
+            for position, item in enumerate(self.items):
+                if position not in checked:
+                    self.num_checked += 1
+                    yield from check(item)
+
+    def get_report_detail(self):
+        if not self.is_sampled:
+            return {}
+        detail = {
+            'items checked': '%d/%d (%.1f%%)' % (
+                self.num_checked,
+                len(self.items),
+                100.0 * self.num_checked / len(self.items),
+            ),
+            'detection confidence': '%.1f%% for a %g%% defect rate' % (
+                100 * self.policy.get_confidence(self.num_checked, len(self.items)),
+                self.policy.min_defect_rate * 100,
+            ),
+        }
+        if self.escalated:
+            detail['escalated'] = 'checked all items after finding a bad one'
+        return detail
@@ -0,0 +1,204 @@
+"""
+Running test plans within a global request and/or time budget.
+
+The tests of all suites are run in order of expected value:
+
+1. tests not making requests (such as validating the baseline), as they're cheap,
+2. tests involving the most parameters not yet covered by the tests scheduled before them,
+3. tests that failed in recent runs in the history, then tests involving parameters whose tests failed,
+4. tests expected to return the most items, according to the baseline index (if any).
+
+Tests that use the results of others (`deferred` ones) run last.
+
+Once the next test would exceed the budget, the rest of the tests are skipped.
+"""
+import heapq
+import logging
+from collections import Counter
+
+from rv.events import get_default_bus
+from rv.utils import wallclock
+
+log = logging.getLogger(__name__)
+
+
+class Budget(object):
+
+    def __init__(self, *, max_requests=None, time_budget=None):
+        """
+        :param max_requests: The maximum number of HTTP requests to make, including those for baselines.
+        :param time_budget: The maximum wall time to spend, in seconds, including building the plans.
+        """
+        self.max_requests = max_requests
+        self.time_budget = time_budget
+        self.start_time = wallclock()
+
+    @property
+    def elapsed(self):
+        return wallclock() - self.start_time
+
+    @property
+    def remaining(self):
+        """
+        The time left in the time budget in seconds, or None if there is no time budget.
+        """
+        if self.time_budget is None:
+            return None
+        return max(self.time_budget - self.elapsed, 0)
+
+    def get_request_timeout(self, default):
+        """
+        Get the timeout for a request made now: the `default`, or the time left in the time budget if less.
+        """
+        remaining = self.remaining
+        if remaining is None:
+            return default
+        return max(min(default, remaining), 0.1)  # A request at the very end may still wait a moment
+
+    def allows(self, requests_made, num_requests, estimated_duration):
+        """
+        Would running a test estimated to make `num_requests` requests and to take `estimated_duration` seconds
+        fit in the budget, when `requests_made` requests have been made so far?
+        """
+        if self.max_requests is not None and requests_made + num_requests > self.max_requests:
+            return False
+        if self.time_budget is not None and self.elapsed + estimated_duration > self.time_budget:
+            return False
+        return True
+
+
+class Scheduler(object):
+
+    def __init__(self, suites, *, budget, history_runs=(), on_test_finished=None, events=None):
+        """
+        :param suites: The suites to run.
+        :param budget: A `Budget`.
+        :param history_runs: Recent run dicts (see `rv.history.HistoryStore.load_recent`) to prioritize by.
+        :param on_test_finished: An optional callable to call with each test as soon as it has been run.
+        :param events: The `rv.events.EventBus` to publish the progress to. By default, it is printed to stdout.
+        """
+        self.suites = suites
+        self.budget = budget
+        for suite in suites:  # For their requests to time out within the budget
+            suite.budget = budget
+        self.on_test_finished = on_test_finished
+        self.events = (events or get_default_bus())
+        self.failures = Counter()  # (suite name, test name) -> number of recent runs it failed in
+        self.param_failures = Counter()  # (suite name, parameter) -> number of failed tests involving it
+        for run in history_runs:
+            for suite_name, suite_data in run.get('suites', {}).items():
+                for test_name in suite_data.get('failures', ()):
+                    self.failures[(suite_name, test_name)] += 1
+        self.durations = {}  # test type -> (count, total) of the durations of the tests run
+
+    def get_params(self, test):
+        return getattr(test, 'params_to_values', {}).keys()
+
+    def get_static_priority(self, test):
+        """
+        Get the priority of the test that does not depend on the other tests scheduled (the bigger, the better).
+
+        :return: tuple of (the number of recent runs the test failed in,
+                           the most failed tests in recent runs involving one of its parameters,
+                           the expected number of items)
+        """
+        suite_name = test.suite.name
+        params = self.get_params(test)
+        param_failures = max((self.param_failures[(suite_name, param.parameter)] for param in params), default=0)
+        index = getattr(test.suite, 'baseline_index', None)
+        expected = (index.count(test.params_to_values) if index and params else 0)
+        return (self.failures[(suite_name, test.name)], param_failures, expected)
+
+    def plan(self):
+        """
+        Order the tests of all suites by their expected value.
+
+        The ordering is greedy: as scheduling a test may lower the number of uncovered parameters
+        of the others (but never raise it), a test's priority is recomputed when it's popped,
+        and it's pushed back if it's no longer the best one.
+
+        :rtype: list[rv.tests.base.Test]
+        """
+        self.param_failures.clear()
+        for suite in self.suites:
+            for test in suite.tests:
+                if self.failures[(suite.name, test.name)]:
+                    for param in self.get_params(test):
+                        self.param_failures[(suite.name, param.parameter)] += 1
+        heap = []
+        deferred = []
+        for suite in self.suites:
+            for test in suite.tests:
+                if test.deferred:
+                    deferred.append(test)
+                    continue
+                params = {(suite.name, param) for param in self.get_params(test)}
+                priority = (test.num_requests == 0, len(params)) + self.get_static_priority(test)
+                heap.append(([-p for p in priority], len(heap), test, params))
+        heapq.heapify(heap)
+        covered = set()
+        plan = []
+        while heap:
+            priority, order, test, params = heapq.heappop(heap)
+            n_uncovered = len(params - covered)
+            if -priority[1] > n_uncovered:
+                priority[1] = -n_uncovered
+                heapq.heappush(heap, (priority, order, test, params))
+                continue
+            covered |= params
+            plan.append(test)
+        return plan + deferred
+
+    def get_num_requests(self, test):
+        """
+        Get the number of requests running the given test makes, including any repeated ones (see `rv.repeat`).
+        """
+        repetition = getattr(test.suite, 'repetition', None)
+        if repetition and test.repeatable:
+            return test.num_requests + repetition.num_requests
+        return test.num_requests
+
+    def estimate_duration(self, test):
+        """
+        Estimate the duration of the given test (including any repeated requests)
+        from those of the tests of its type run before it.
+        """
+        count, total = self.durations.get(test.type, (0, 0))
+        return (total / count if count else 0)
+
+    def run(self):
+        """
+        Run the planned tests until the budget is exhausted, and mark the rest as skipped.
+
+        :return: The tests run, and the tests skipped.
+        :rtype: tuple[list, list]
+        """
+        plan = self.plan()
+        for suite in self.suites:
+            self.events.publish('suite_started', suite=suite, total=len(suite.tests))
+        run = []
+        for test in plan:
+            requests_made = sum(getattr(suite, 'num_requests', 0) for suite in self.suites)
+            if not self.budget.allows(requests_made, self.get_num_requests(test), self.estimate_duration(test)):
+                break
+            self.events.publish('test_started', suite=test.suite, test=test)
+            start_time = wallclock()
+            test.run()
+            duration = wallclock() - start_time  # Unlike `test.duration`, this includes any repeated requests
+            count, total = self.durations.get(test.type, (0, 0))
+            self.durations[test.type] = (count + 1, total + duration)
+            run.append(test)
+            if self.on_test_finished:
+                self.on_test_finished(test)
+            self.events.publish_test_finished(test)
+        for suite in self.suites:
+            self.events.publish('suite_finished', suite=suite)
+        skipped = plan[len(run):]
+        for test in skipped:
+            test.skipped = True
+        if skipped:
+            log.info(
+                'budget exhausted after %d tests (%.1f sec); skipped %d',
+                len(run), self.budget.elapsed, len(skipped),
+            )
+        return (run, skipped)
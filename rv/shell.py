@@ -1,13 +1,20 @@
 import logging
+import os
+import random
 
 import click
 
-from rv.report import HTMLReportWriter
-from rv.utils import find_class
+from rv.utils import cached_property
 
 log = logging.getLogger(__name__)
 
 
+def validate_non_negative(ctx, param, value):
+    if value is not None and value < 0:
+        raise click.BadParameter('%s is not a non-negative number' % value)
+    return value
+
+
 class BaseValidator(object):
 
     def get_click_options(self):
@@ -49,6 +56,15 @@ class BaseValidator(object):
             yield None
         raise NotImplementedError('Implement get_suites in a subclass')
 
+    def get_slos(self, **kwargs):
+        """
+        Get the latency SLOs for this Validator's suites (in addition to those declared for their Params).
+
+        :param kwargs: Option values from Click (or elsewhere!)
+        :rtype: Iterable[rv.slo.LatencySLO]
+        """
+        return []
+
 
 class RvCLI(click.MultiCommand):
     """
@@ -57,6 +73,7 @@ class RvCLI(click.MultiCommand):
     Does quite some magic around Click -- hopefully you, dear reader,
     do not need to touch that voodoo.
     """
+    events = None  # The `rv.events.EventBus` of the run, once running
 
     def __init__(self):
         super().__init__(
@@ -69,29 +86,417 @@ class RvCLI(click.MultiCommand):
                     help='emit HTML report to this path',
                     type=click.File(mode='w', encoding='utf-8', lazy=True),
                 ),
+                click.Option(
+                    ('--jsonl',),
+                    help='stream a JSON Lines record of each test to this path',
+                    type=click.Path(dir_okay=False, writable=True),
+                ),
+                click.Option(
+                    ('--junit',),
+                    help='stream JUnit-style XML of each test to this path',
+                    type=click.Path(dir_okay=False, writable=True),
+                ),
+                click.Option(
+                    ('--history',),
+                    help='store the latency distributions of this run in this directory',
+                    type=click.Path(file_okay=False),
+                ),
+                click.Option(
+                    ('--compare-to',),
+                    metavar='RUN',
+                    help='compare latencies to a run (an ID in --history, "latest", or a file path)',
+                ),
+                click.Option(
+                    ('--profile',),
+                    multiple=True,
+                    type=click.Choice(['cprofile', 'sample', 'tracemalloc']),
+                    help='profile the validator itself (may be repeated); artifacts are written next to the report',
+                ),
+                click.Option(
+                    ('--watch',),
+                    type=float,
+                    metavar='SECONDS',
+                    help='keep running the tests in cycles this many seconds apart, refreshing baselines incrementally',
+                ),
+                click.Option(
+                    ('--watch-slice',),
+                    type=int,
+                    default=0,
+                    help='in watch mode, the number of tests of each suite to run per cycle (default: all)',
+                ),
+                click.Option(
+                    ('--watch-cycles',),
+                    type=int,
+                    default=0,
+                    help='in watch mode, stop after this many cycles (default: run until interrupted)',
+                ),
+                click.Option(
+                    ('--coordinator',),
+                    metavar='[HOST:]PORT',
+                    help='distribute tests to workers connecting to this address',
+                ),
+                click.Option(
+                    ('--workers',),
+                    type=int,
+                    default=0,
+                    help='spawn this many local worker processes (implies --coordinator)',
+                ),
+                click.Option(
+                    ('--shard-size',),
+                    type=int,
+                    default=20,
+                    help='number of tests to hand to a worker at a time',
+                ),
+                click.Option(
+                    ('--max-requests',),
+                    type=click.IntRange(min=1),
+                    help='stop (skipping the rest of the tests) before making more HTTP requests than this',
+                ),
+                click.Option(
+                    ('--time-budget',),
+                    type=float,
+                    callback=validate_non_negative,  # (`click.FloatRange` requires click 7)
+                    help='stop (skipping the rest of the tests) before running for longer than this many seconds',
+                ),
+                click.Option(
+                    ('--progress',),
+                    type=click.Choice(['live', 'lines', 'none']),
+                    default='live',
+                    help='how to show progress: a (rate-limited) live display on stderr, '
+                         'a line per test (and error) on stdout, or not at all',
+                ),
+                click.Option(
+                    ('--seed',),
+                    type=int,
+                    help='seed the random generation of test plans, for reproducible (or comparable) runs',
+                ),
+                click.Option(
+                    ('--repeat',),
+                    type=click.IntRange(min=0),
+                    default=0,
+                    help='re-issue each test\'s request this many times, recording the latency distribution',
+                ),
+                click.Option(
+                    ('--warmup',),
+                    type=click.IntRange(min=0),
+                    default=0,
+                    help='with --repeat, first re-issue each request this many times, discarding the latencies',
+                ),
+                click.Option(
+                    ('--metrics-port',),
+                    type=int,
+                    help='serve OpenMetrics (for e.g. Prometheus to scrape) on this port while running',
+                ),
+                click.Option(
+                    ('--metrics-textfile',),
+                    type=click.Path(dir_okay=False, writable=True),
+                    help='write metrics into this file (for e.g. the node exporter\'s textfile collector)',
+                ),
             ],
         )
 
+    builtin_commands = {
+        'merge': 'get_merge_command',
+        'worker': 'get_worker_command',
+    }
+
+    @cached_property
+    def registry(self):
+        from rv.registry import ValidatorRegistry
+        return ValidatorRegistry(base_class=BaseValidator)
+
+    def list_commands(self, ctx):
+        return sorted(self.builtin_commands) + self.registry.names()
+
     def get_command(self, ctx, name):
-        self.validator = find_class(name, BaseValidator)()
+        if name in self.builtin_commands:
+            return getattr(self, self.builtin_commands[name])()
+        try:
+            self.validator = self.registry.get(name)()
+        except (ImportError, LookupError) as exc:
+            ctx.fail('unable to load validator %s: %s' % (name, exc))
         command = self.validator.get_click_command()
         command.callback = self.run
         return command
 
-    def run(self, **kwargs):
-        suites = list(self.validator.get_suites(**kwargs))
+    def get_worker_command(self):
+        return click.Command(
+            name='worker',
+            help='Run tests handed out by a coordinator.',
+            params=[click.Argument(('address',))],
+            callback=self.run_worker,
+        )
+
+    def run_worker(self, address):
+        from rv.distributed import Worker
+        Worker(address).run()
+
+    def get_merge_command(self):
+        return click.Command(
+            name='merge',
+            help='Merge JSON Lines (or JUnit XML) result files into one report (see --html).',
+            params=[click.Argument(('paths',), nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))],
+            callback=self.run_merge,
+        )
+
+    def run_merge(self, paths):
+        from rv.results import merge_results
+        suites = merge_results(paths)
         for suite in suites:
             print('## %s' % suite.name)
-            suite.run()
-            print('-' * 80)
-            for err in suite.errors:
-                print('*', err)
-            print('=' * 80)
+            self.print_summary(suite)
+        self.write_html(suites)
+
+    def get_result_writers(self):
+        from rv.results import JSONLResultWriter, JUnitResultWriter
+        writers = []
+        if self.options['jsonl']:
+            writers.append(JSONLResultWriter(self.options['jsonl']))
+        if self.options['junit']:
+            writers.append(JUnitResultWriter(self.options['junit']))
+        return writers
+
+    def run(self, **kwargs):
+        from rv.slo import SLOMonitor
+        budget = self.get_budget()
+        self.check_mode(budget)
+        if self.options['seed'] is not None:  # The plans are generated lazily, but with the global RNG
+            random.seed(self.options['seed'])
+        suites = list(self.validator.get_suites(**kwargs))
+        self.set_repetition(suites)
+        metrics = self.get_metrics()
+        self.events = events = self.get_event_bus(self.get_result_writers() + ([metrics] if metrics else []))
+        slo_monitor = SLOMonitor(suites, self.validator.get_slos(**kwargs))
+
+        def on_test_finished(test):  # Before the test's being finished is published, so subscribers see violations
+            slo_monitor.check_test(test)
+
+        profiler = self.get_profiler()
+        profiler.start(suites)
+        try:
+            self.run_suites(suites, kwargs, profiler, budget=budget, on_test_finished=on_test_finished, metrics=metrics)
+            regression_suite = self.check_regressions(suites, on_test_finished=on_test_finished)
+            slo_suite = self.check_slos(suites, slo_monitor, on_test_finished=on_test_finished)
+        finally:
+            profiler.stop(suites)
+            events.close()
+            self.write_metrics(metrics)
+            for suite in suites:
+                suite.close()
+        self.save_history(suites)
+        suites.extend(suite for suite in (regression_suite, slo_suite) if suite)
+        self.write_html(suites)
+        if any(suite.num_errors for suite in suites):
+            click.get_current_context().exit(1)
+
+    def check_mode(self, budget):
+        """
+        Refuse combinations of options (and so of modes) that don't go together.
+        """
+        distributed = (self.options['coordinator'] or self.options['workers'])
+        if self.options['watch'] and distributed:
+            raise click.UsageError('--watch can not be combined with distributed runs')
+        if budget and (self.options['watch'] or distributed):
+            raise click.UsageError('--max-requests and --time-budget can not be combined with --watch or distributed')
+        if self.options['repeat'] and distributed:
+            raise click.UsageError('--repeat can not be combined with distributed runs')
+        if self.options['profile'] and distributed:  # The tests run in the workers' processes, not profiled
+            raise click.UsageError('--profile can not be combined with distributed runs')
 
+    def run_suites(self, suites, params, profiler, budget=None, on_test_finished=None, metrics=None):
+        """
+        Run the suites in the mode the options call for (distributed, watch, within a budget or plain).
+        """
+        if self.options['coordinator'] or self.options['workers']:
+            self.run_distributed(suites, params, on_test_finished=on_test_finished)
+        elif self.options['watch']:
+            with profiler.profile('watch'):  # The suites' tests are interleaved, so they're profiled together
+                self.run_watch(suites, on_test_finished=on_test_finished, metrics=metrics)
+        elif budget:
+            with profiler.profile('scheduled'):
+                self.run_scheduled(suites, budget, on_test_finished=on_test_finished)
+        else:
+            for suite in suites:
+                print('## %s' % suite.name)
+                with profiler.profile_suite(suite):
+                    suite.run(on_test_finished=on_test_finished, events=self.events)
+                self.print_summary(suite)
+
+    def save_history(self, suites):
+        if self.options['history']:
+            from rv.history import HistoryStore
+            run_id = HistoryStore(self.options['history']).save(suites)
+            log.info('stored run %s in %s', run_id, self.options['history'])
+
+    def check_regressions(self, suites, on_test_finished=None):
+        """
+        Compare the latencies of the run suites to those of the `--compare-to` run, if one was given.
+
+        :return: The run RegressionSuite, or None.
+        """
+        from rv.history import HistoryStore, load_run
+        from rv.suites.regression import RegressionSuite
+        compare_to = self.options['compare_to']
+        if not compare_to:
+            return None
+        if os.path.isfile(compare_to):
+            baseline_run = load_run(compare_to)
+        elif self.options['history']:
+            baseline_run = HistoryStore(self.options['history']).load(compare_to)
+        else:
+            raise click.UsageError('--compare-to requires a file path, or --history')
+        suite = RegressionSuite(suites=suites, baseline_run=baseline_run)
+        print('## %s' % suite.name)
+        suite.run(on_test_finished=on_test_finished, events=self.events)
+        self.print_summary(suite)
+        return suite
+
+    def check_slos(self, suites, slo_monitor, on_test_finished=None):
+        """
+        Evaluate the latency SLOs declared for the validator and its Params, if any.
+
+        :return: The run SLOSuite, or None.
+        """
+        if not slo_monitor:
+            return None
+        from rv.suites.slo import SLOSuite
+        suite = SLOSuite(suites=suites, slos=slo_monitor.slos)
+        print('## %s' % suite.name)
+        suite.run(on_test_finished=on_test_finished, events=self.events)
+        self.print_summary(suite)
+        return suite
+
+    def get_profiler(self):
+        from rv.profiling import Profiler
+        html_fp = self.options['html']
+        directory = '.'
+        if html_fp and html_fp.name != '-':
+            directory = (os.path.dirname(html_fp.name) or '.')
+        return Profiler(modes=self.options['profile'], directory=directory)
+
+    def write_html(self, suites):
         html_fp = self.options['html']
         if html_fp:
+            from rv.report import HTMLReportWriter
             hrw = HTMLReportWriter(suites)
-            html_fp.write(hrw.render())
+            if html_fp.name == '-':
+                html_fp.write(hrw.render())
+            else:  # (Re)write the file by name, as it may be written several times in watch mode
+                with open(html_fp.name, 'w', encoding='utf-8') as fp:
+                    fp.write(hrw.render())
+
+    def set_repetition(self, suites):
+        if not self.options['repeat']:
+            return
+        from rv.repeat import Repetition
+        repetition = Repetition(repeat=self.options['repeat'], warmup=self.options['warmup'])
+        for suite in suites:
+            suite.repetition = repetition
+
+    def get_budget(self):
+        """
+        Get the Budget to run within (starting its clock), or None if no budget was given.
+        """
+        if not (self.options['max_requests'] or self.options['time_budget'] is not None):
+            return None
+        from rv.scheduler import Budget
+        return Budget(max_requests=self.options['max_requests'], time_budget=self.options['time_budget'])
+
+    def run_scheduled(self, suites, budget, on_test_finished=None):
+        from rv.scheduler import Scheduler
+        history_runs = ()
+        if self.options['history']:
+            from rv.history import HistoryStore
+            history_runs = HistoryStore(self.options['history']).load_recent(5)
+        scheduler = Scheduler(
+            suites,
+            budget=budget,
+            history_runs=history_runs,
+            on_test_finished=on_test_finished,
+            events=self.events,
+        )
+        print('## %s' % ', '.join(suite.name for suite in suites))
+        scheduler.run()
+        self.events.flush()
+        for suite in suites:
+            print('## %s' % suite.name)
+            for key, value in sorted((suite.get_coverage() or {}).items()):
+                print('%s: %s' % (key, value))
+            self.print_summary(suite)
+
+    def get_metrics(self):
+        """
+        Get the ValidationMetrics to update (and start serving them, if `--metrics-port` was given),
+        or None if metrics were not asked for.
+        """
+        if not (self.options['metrics_port'] or self.options['metrics_textfile']):
+            return None
+        from rv.metrics import ValidationMetrics
+        metrics = ValidationMetrics()
+        if self.options['metrics_port']:
+            metrics.serve(self.options['metrics_port'])
+        return metrics
+
+    def write_metrics(self, metrics):
+        if metrics and self.options['metrics_textfile']:
+            metrics.write_textfile(self.options['metrics_textfile'])
+
+    def run_watch(self, suites, on_test_finished=None, metrics=None):
+        from rv.watch import Watcher
+
+        def on_cycle_finished(cycle):
+            self.events.flush()
+            self.write_html(suites)
+            self.write_metrics(metrics)
+
+        watcher = Watcher(
+            suites,
+            interval=self.options['watch'],
+            slice_size=self.options['watch_slice'],
+            max_cycles=self.options['watch_cycles'],
+            on_test_finished=on_test_finished,
+            on_cycle_finished=on_cycle_finished,
+            events=self.events,
+        )
+        watcher.run()
+
+    def run_distributed(self, suites, params, on_test_finished=None):
+        from rv.distributed import Coordinator
+        coordinator = Coordinator(
+            validator=self.validator,
+            params=params,
+            address=self.options['coordinator'],
+            workers=self.options['workers'],
+            shard_size=self.options['shard_size'],
+            on_test_finished=on_test_finished,
+            events=self.events,
+        )
+        coordinator.run(suites)
+        self.events.flush()
+        for suite in suites:
+            print('## %s' % suite.name)
+            self.print_summary(suite)
+
+    def get_event_bus(self, subscribers):
+        """
+        Get the (threaded) bus to publish the run's events to, with the given subscribers
+        and the `--progress` display.
+        """
+        from rv.events import EventBus, LinePrinter, ProgressDisplay
+        progress = self.options['progress']
+        if progress == 'live':
+            subscribers = [ProgressDisplay()] + subscribers
+        elif progress == 'lines':
+            subscribers = [LinePrinter()] + subscribers
+        return EventBus(subscribers, threaded=True)
+
+    def print_summary(self, suite):
+        if self.events:  # Let the progress display finish first
+            self.events.flush()
+        print('-' * 80)
+        for err in suite.errors:
+            print('*', err)
+        print('=' * 80)
 
     def init_callback(self, **options):
         self.options = options
@@ -0,0 +1,98 @@
+"""
+Latency service level objectives (SLOs).
+
+SLOs are declared per validator (`BaseValidator.get_slos`) and per Param (`Param(slo=...)`),
+and apply to "query groups" (see `rv.history.get_query_groups`): e.g. `param:service_code`
+for the tests filtering by `service_code`, `type:SingleParam` for all single-parameter tests,
+`all` for all tests making requests, and `baseline` for the requests for the suites' baselines.
+
+A test's latency is the duration of the HTTP request(s) it made, if any.
+
+SLOs with no percentile (i.e. maximums) are checked against each test as soon as it has finished,
+failing it on a violation; all SLOs are then evaluated as a whole by a `SLOSuite` after the run.
+"""
+from rv.excs import LatencySLOViolation
+from rv.history import get_query_groups
+
+
+class LatencySLO(object):
+
+    def __init__(self, *, threshold, percentile=None, group=None):
+        """
+        :param threshold: The latency threshold, in seconds.
+        :param percentile: The percentile (e.g. 95) of latencies that must be below the threshold;
+                           None for all of them (i.e. the maximum).
+        :param group: The query group the SLO applies to. (Not needed for Params' SLOs.)
+        """
+        self.threshold = threshold
+        self.percentile = percentile
+        self.group = group
+
+    def __str__(self):
+        return '%s %s < %g ms' % (
+            self.group or '?',
+            ('p%g' % self.percentile if self.percentile is not None else 'max'),
+            self.threshold * 1000,
+        )
+
+    def for_group(self, group):
+        return LatencySLO(threshold=self.threshold, percentile=self.percentile, group=group)
+
+
+def get_test_groups(test):
+    """
+    Get the names of the query groups (for SLO purposes) the given test belongs to.
+
+    :rtype: list[str]
+    """
+    return ['all'] + get_query_groups(test)
+
+
+def get_latency(test):
+    """
+    Get the latency of the given test (the duration of its requests), or None if it made no requests.
+    """
+    return test.request_duration
+
+
+class SLOMonitor(object):
+    """
+    Collects the SLOs declared for suites, and checks maximum SLOs against tests as they finish.
+    """
+
+    def __init__(self, suites, slos=()):
+        """
+        :param suites: The suites being run; the SLOs of their Params are collected.
+        :param slos: SLOs declared for the validator.
+        """
+        self.slos = list(slos)
+        for suite in suites:
+            for param in getattr(suite, 'parameters', ()):
+                if param.slo:
+                    self.slos.append(param.slo.for_group('param:%s' % param.parameter))
+        self.maximums = {}  # group -> maximum SLOs
+        for slo in self.slos:
+            if slo.percentile is None:
+                self.maximums.setdefault(slo.group, []).append(slo)
+
+    def __bool__(self):
+        return bool(self.slos)
+
+    def check_test(self, test):
+        """
+        Check the test against the maximum SLOs of its groups, adding any violations to its errors.
+
+        :return: The violations
+        :rtype: list[LatencySLOViolation]
+        """
+        latency = get_latency(test)
+        if latency is None or not self.maximums:
+            return []
+        violations = [
+            LatencySLOViolation(test=test, message='%.1f ms violates %s' % (latency * 1000, slo))
+            for group in get_test_groups(test)
+            for slo in self.maximums.get(group, ())
+            if latency >= slo.threshold
+        ]
+        test.errors.extend(violations)
+        return violations
@@ -0,0 +1,154 @@
+"""
+Small statistics helpers (so as not to need SciPy and friends).
+"""
+import math
+import statistics
+
+
+def rank(values):
+    """
+    Rank the given values (1-based), giving tied values the average of their ranks.
+
+    :return: Tuple of (ranks in input order, list of tie group sizes)
+    :rtype: tuple[list[float], list[int]]
+    """
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    ties = []
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        if j > i:
+            ties.append(j - i + 1)
+        i = j + 1
+    return ranks, ties
+
+
+def mann_whitney_u(sample, reference):
+    """
+    One-sided Mann-Whitney U test (with the normal approximation, tie and continuity corrections).
+
+    :param sample: Sample of values
+    :param reference: Reference sample of values
+    :return: Tuple of (U statistic of `sample`,
+             p-value for the alternative hypothesis that `sample` tends to be greater than `reference`)
+    :rtype: tuple[float, float]
+    """
+    n1 = len(sample)
+    n2 = len(reference)
+    if not (n1 and n2):
+        raise ValueError('both samples must be non-empty')
+    ranks, ties = rank(list(sample) + list(reference))
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    tie_term = sum(t ** 3 - t for t in ties) / (n * (n - 1)) if n > 1 else 0
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance <= 0:  # All values tied; no evidence either way.
+        return u, 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def wilcoxon_signed_rank(differences):
+    """
+    One-sided Wilcoxon signed-rank test of paired differences (dropping zero differences;
+    with the normal approximation, tie and continuity corrections).
+
+    :param differences: The differences of the pairs of values
+    :return: Tuple of (the sum of the ranks of the positive differences,
+             p-value for the alternative hypothesis that the differences tend to be positive)
+    :rtype: tuple[float, float]
+    """
+    differences = [d for d in differences if d]
+    n = len(differences)
+    if not n:  # All pairs tied; no evidence either way.
+        return 0.0, 1.0
+    ranks, ties = rank([abs(d) for d in differences])
+    w = sum((r for (r, d) in zip(ranks, differences) if d > 0), 0.0)
+    variance = n * (n + 1) * (2 * n + 1) / 24 - sum(t ** 3 - t for t in ties) / 48
+    if variance <= 0:
+        return w, 1.0
+    z = (w - n * (n + 1) / 4 - 0.5) / math.sqrt(variance)
+    return w, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def common_language_effect_size(sample, reference):
+    """
+    The probability that a value drawn from `sample` is greater than one drawn from `reference`
+    (ties counting half); 0.5 means no effect.
+
+    :rtype: float
+    """
+    u, p = mann_whitney_u(sample, reference)
+    return u / (len(sample) * len(reference))
+
+
+def percentile(values, pct):
+    """
+    Linearly interpolated percentile of the given values.
+
+    :param values: Values (need not be sorted)
+    :param pct: Percentile, 0..100
+    :rtype: float
+    """
+    values = sorted(values)
+    if not values:
+        raise ValueError('no values')
+    position = (len(values) - 1) * pct / 100
+    lower = int(math.floor(position))
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def median_ratio(sample, reference):
+    """
+    The ratio of the medians of `sample` and `reference`.
+
+    :rtype: float
+    """
+    reference_median = statistics.median(reference)
+    if not reference_median:
+        return math.inf
+    return statistics.median(sample) / reference_median
+
+
+def median_confidence_interval(values, z=1.96):
+    """
+    A distribution-free confidence interval for the median of the given values,
+    from the order statistics (normal approximation of the binomial; z=1.96 for about 95%).
+
+    :return: (lower, upper); for very small samples, the range of the values
+    :rtype: tuple[float, float]
+    """
+    values = sorted(values)
+    if not values:
+        raise ValueError('no values')
+    n = len(values)
+    half_width = z * math.sqrt(n) / 2
+    lower = max(0, int(math.floor(n / 2 - half_width)) - 1)  # (Ranks are 1-based, indexes are not)
+    upper = min(n - 1, int(math.ceil(1 + n / 2 + half_width)) - 1)
+    return (values[lower], values[upper])
+
+
+def describe(values):
+    """
+    Describe the distribution of the given samples: `n`, `mean`, `stdev`, `variance`,
+    `median`, and the bounds of its 95% confidence interval, `median_low` and `median_high`.
+
+    :rtype: dict[str, float]
+    """
+    median_low, median_high = median_confidence_interval(values)
+    variance = (statistics.variance(values) if len(values) > 1 else 0.0)
+    return {
+        'n': len(values),
+        'mean': statistics.mean(values),
+        'stdev': math.sqrt(variance),
+        'variance': variance,
+        'median': statistics.median(values),
+        'median_low': median_low,
+        'median_high': median_high,
+    }
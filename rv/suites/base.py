@@ -1,8 +1,9 @@
 import logging
 import statistics
+import threading
 from itertools import chain
 
-import requests
+from rv.utils import cached_property
 
 
 class Suite(object):
@@ -11,6 +12,9 @@ class Suite(object):
     """
 
     description = ""
+    sampling = None  # A `rv.sampling.SamplingPolicy` for the tests' per-item checks; None to check all items
+    repetition = None  # A `rv.repeat.Repetition` for repeated latency measurements; None to measure once
+    trace_memory = False  # Whether to measure the tests' memory peaks; set when profiling (see `rv.profiling`)
 
     def __init__(self, *, name):
         self.name = name
@@ -34,6 +38,58 @@ class Suite(object):
         """
         return {}
 
+    def get_coverage(self):
+        """
+        Get a dict describing the coverage achieved by a run that skipped tests (due to a budget, say).
+
+        :return: dict, or None if no tests were skipped
+        """
+        skipped = [t for t in self.tests if t.skipped]
+        if not skipped:
+            return None
+        return {
+            'tests run': '%d/%d' % (len(self.tests) - len(skipped), len(self.tests)),
+            'tests skipped': len(skipped),
+        }
+
+    def refresh(self):
+        """
+        Refresh any state (such as baseline data) the suite keeps between runs in a long-running mode.
+
+        :return: The number of changed items, if applicable.
+        """
+        return 0
+
+    def replan(self):
+        """
+        Forget the current tests, so they are regenerated (from refreshed state) the next time they're needed.
+        """
+
+    def close(self):
+        """
+        Release any resources (such as connections or threads) the suite holds, once it's no longer run.
+        """
+
+    def serialize_test(self, test):
+        """
+        Get a JSON-serializable specification of the given test, from which
+        `deserialize_test` (possibly in another process) can recreate it.
+
+        :param test: A test in this suite.
+        :return: A specification dict, or None if the test can't be run elsewhere.
+        :rtype: dict|None
+        """
+        return None
+
+    def deserialize_test(self, spec):
+        """
+        Recreate a test from a specification returned by `serialize_test`.
+
+        :param spec: Specification dict
+        :rtype: rv.tests.base.Test
+        """
+        raise NotImplementedError('%s does not support deserializing tests' % self.__class__.__name__)
+
     def get_timing_stats(self):
         """
         Return a dictionary of timing statistics.
@@ -49,7 +105,7 @@ class Suite(object):
             'total': sum(durations),
             'mean': statistics.mean(durations),
             'median': statistics.median(durations),
-            'stdev': statistics.stdev(durations),
+            'stdev': (statistics.stdev(durations) if len(durations) > 1 else 0),
         }
 
     def calculate_apdex(self, satisfied_threshold_sec):
@@ -75,16 +131,26 @@ class Suite(object):
                 n_tolerating += 1
         return (n_satisfied + (n_tolerating / 2)) / len(durations)
 
-    def run(self):
+    def run(self, on_test_finished=None, events=None):
         """
-        Run all the tests and print results to stdout.
+        Run all the tests, publishing their progress (see `rv.events`).
+
+        :param on_test_finished: An optional callable to call with each test as soon as it has been run
+                                 (before its being finished is published).
+        :param events: The `rv.events.EventBus` to publish to. By default, the progress is printed to stdout.
         """
+        if events is None:
+            from rv.events import get_default_bus
+            events = get_default_bus()
         self.log.info('%d tests to run...', len(self.tests))
-        for i, test in enumerate(self.tests, 1):
-            print('{index}/{total}: {name}'.format(index=i, total=len(self.tests), name=test.name))
+        events.publish('suite_started', suite=self, total=len(self.tests))
+        for test in self.tests:
+            events.publish('test_started', suite=self, test=test)
             test.run()
-            for error in test.errors:
-                print("[!]", error)
+            if on_test_finished:
+                on_test_finished(test)
+            events.publish_test_finished(test)
+        events.publish('suite_finished', suite=self)
 
 
 class RequestSuite(Suite):
@@ -95,14 +161,31 @@ class RequestSuite(Suite):
     send with each request (provided `.session` isn't accessed directly).
     """
     base_params = {}
-
-    def __init__(self, *, name):
-        super().__init__(name=name)
-        self.session = requests.Session()
-
-    def request(self, method, url, **kwargs):
+    num_requests = 0  # The number of requests made so far
+    num_requests_lock = threading.Lock()  # As some suites make requests from several threads
+    budget = None  # The `rv.scheduler.Budget` the suite is run within, if any
+    request_timeout = 60  # The default timeout for requests in seconds, within a budget
+
+    @cached_property
+    def session(self):
+        import requests
+        return requests.Session()
+
+    def close(self):
+        session = self.__dict__.pop('session', None)
+        if session:
+            session.close()
+
+    def request(self, method, url, *, session=None, **kwargs):
+        """
+        Make a request with the suite's session (or the given one).
+        """
         method = method.upper()
+        with self.num_requests_lock:
+            self.num_requests += 1
         if method == "GET":
             params = self.base_params.copy()
             kwargs['params'] = dict(params, **kwargs.get('params', {}))
-        return self.session.request(method=method, url=url, **kwargs)
+        if self.budget:
+            kwargs.setdefault('timeout', self.budget.get_request_timeout(self.request_timeout))
+        return (session or self.session).request(method=method, url=url, **kwargs)
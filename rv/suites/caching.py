@@ -0,0 +1,120 @@
+from rv.suites.base import RequestSuite
+from rv.tests.caching import ConditionalGetTest, ValidatorConsistencyTest
+from rv.tests.params import BaseParamTest
+from rv.utils import cached_property, get_random
+
+
+class ConditionalGetSuite(RequestSuite):
+    """
+    Re-issues a sample of the queries generated by a `ListTester` as conditional requests.
+    """
+    description = "Test that conditional requests and cache validators work, and what they save"
+    conditional_headers = ('If-None-Match', 'If-Modified-Since')
+
+    def __init__(
+        self,
+        *,
+        list_tester,
+        sample_size=20,
+        updated_param=None,
+        require_not_modified=False,
+        max_not_modified_ratio=1.0,
+        seed=None,
+        name=None
+    ):
+        """
+        :param list_tester: The `ListTester` whose endpoint and queries to use.
+        :param sample_size: The number of queries to sample (in addition to the unfiltered one).
+        :param updated_param: A `Param` reading the items' last update time, to check `Last-Modified` against.
+                              Defaults to the list tester's `refresh_param`.
+        :param require_not_modified: Whether a full response to a conditional request with unchanged validators
+                                     is an error. (Servers may ignore conditional requests, so by default,
+                                     such misses only lower the hit rate.)
+        :param max_not_modified_ratio: The maximum ratio of the median latencies of 304 and full responses.
+        :param seed: A seed for sampling the queries. By default, drawn from the global RNG (see `--seed`).
+        :param name: The suite's name. One can also be autogenerated.
+        """
+        super(ConditionalGetSuite, self).__init__(name=(name or 'conditional requests to %s' % list_tester.name))
+        self.list_tester = list_tester
+        self.endpoint = list_tester.endpoint
+        self.base_params = list_tester.base_params
+        self.sample_size = sample_size
+        self.updated_param = (updated_param or list_tester.refresh_param)
+        self.require_not_modified = require_not_modified
+        self.max_not_modified_ratio = max_not_modified_ratio
+        self.random = get_random(seed)
+        self.last_validators = {}  # query key -> the validators and newest item update last seen for the query
+
+    def get_candidate_queries(self):
+        """
+        Get the queries of the list tester's (current) tests, keyed like `ConditionalGetTest.query_key`.
+
+        :rtype: dict[tuple, dict]
+        """
+        queries = {}
+        for test in self.list_tester.tests:
+            if isinstance(test, BaseParamTest):
+                queries.setdefault(tuple(sorted(test.query.items())), test.query)
+        return queries
+
+    def get_queries(self):
+        queries = self.get_candidate_queries()
+        sample = self.random.sample(sorted(queries), min(self.sample_size, len(queries)))
+        return [{}] + [queries[key] for key in sorted(sample)]
+
+    @property
+    def conditional_tests(self):
+        return [test for test in self.tests if isinstance(test, ConditionalGetTest)]
+
+    def _build_tests(self):
+        for query in self.get_queries():
+            yield ConditionalGetTest(suite=self, query=query)
+        yield ValidatorConsistencyTest(suite=self)
+
+    @cached_property
+    def tests(self):
+        return list(self._build_tests())
+
+    def refresh(self):
+        """
+        Forget the validators last seen for queries that can no longer be planned, as the list tester's
+        tests (and so queries) change with its baseline.
+        """
+        keep = set(self.get_candidate_queries()) | {test.query_key for test in self.conditional_tests}
+        for key in set(self.last_validators) - keep:
+            del self.last_validators[key]
+        return 0
+
+    def replan(self):
+        self.__dict__.pop('tests', None)
+
+    def get_savings(self):
+        """
+        Summarize the conditional requests made: the hit rate, and the latency and bytes saved by
+        304 responses compared to the full 200 responses.
+
+        :rtype: dict|None
+        """
+        n_requests = 0
+        n_hits = 0
+        seconds_saved = 0
+        bytes_saved = 0
+        for test in self.conditional_tests:
+            n_requests += len(test.conditional)
+            for measurement in test.hits.values():
+                n_hits += 1
+                seconds_saved += test.full['duration'] - measurement['duration']
+                bytes_saved += test.full['bytes'] - measurement['bytes']
+        if not n_requests:
+            return None
+        return {
+            'hit rate': '%d/%d (%.0f%%)' % (n_hits, n_requests, 100.0 * n_hits / n_requests),
+            'latency saved (msec)': round(seconds_saved * 1000, 1),
+            'bytes saved': bytes_saved,
+        }
+
+    def get_report_detail(self):
+        return dict(
+            self.get_savings() or {},
+            endpoint=self.endpoint,
+        )
@@ -0,0 +1,132 @@
+import json
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from rv.history import get_query_groups
+from rv.suites.base import RequestSuite
+from rv.tests.differential import CandidateLatencyTest, DifferentialTest
+from rv.tests.params import BaseParamTest
+from rv.utils import cached_property, get_random
+
+
+class DifferentialSuite(RequestSuite):
+    """
+    Runs the queries generated by a `ListTester` against both its endpoint (the "reference")
+    and a candidate endpoint (such as a new backend), side by side, and compares the returned items
+    and the latencies of each query group.
+    """
+    description = "Test that a candidate endpoint returns the same items as the reference endpoint, as fast"
+
+    def __init__(
+        self,
+        *,
+        list_tester,
+        candidate_endpoint,
+        id_property=None,
+        sample_size=None,
+        alpha=0.01,
+        min_effect=0.1,
+        min_samples=5,
+        seed=None,
+        name=None
+    ):
+        """
+        :param list_tester: The `ListTester` whose endpoint (as the reference) and queries to use.
+        :param candidate_endpoint: The endpoint URL to compare against the list tester's.
+        :param id_property: The property identifying items. Defaults to the list tester's `id_property`;
+                            if neither is set, items are compared as a whole.
+        :param sample_size: The number of queries to sample (in addition to the unfiltered one), or None for all.
+        :param alpha: Significance level for the Wilcoxon signed-rank test of the latencies.
+        :param min_effect: The minimum relative increase in median latency considered a slowdown.
+        :param min_samples: The minimum number of queries in a query group for its latencies to be compared.
+        :param seed: A seed for sampling the queries. By default, drawn from the global RNG (see `--seed`).
+        :param name: The suite's name. One can also be autogenerated.
+        """
+        super(DifferentialSuite, self).__init__(name=(name or '%s vs. %s' % (list_tester.name, candidate_endpoint)))
+        self.list_tester = list_tester
+        self.endpoint = list_tester.endpoint
+        self.base_params = list_tester.base_params
+        self.candidate_endpoint = candidate_endpoint
+        self.id_property = (id_property or list_tester.id_property)
+        self.sample_size = sample_size
+        self.alpha = alpha
+        self.min_effect = min_effect
+        self.min_samples = min_samples
+        self.random = get_random(seed)
+
+    @cached_property
+    def executor(self):
+        return ThreadPoolExecutor(max_workers=2, thread_name_prefix='differential')
+
+    @cached_property
+    def candidate_session(self):
+        import requests
+        return requests.Session()  # Sessions are not thread-safe, so each endpoint is requested with its own
+
+    def get_session(self, endpoint):
+        return (self.candidate_session if endpoint == self.candidate_endpoint else self.session)
+
+    def close(self):
+        executor = self.__dict__.pop('executor', None)
+        if executor:
+            executor.shutdown()
+        candidate_session = self.__dict__.pop('candidate_session', None)
+        if candidate_session:
+            candidate_session.close()
+        super(DifferentialSuite, self).close()
+
+    def get_keyed_items(self, response):
+        """
+        Decode the given response's items, keyed by their ID (or if there's no `id_property`,
+        by their JSON serialization).
+
+        :rtype: dict[object, dict]
+        """
+        items = self.list_tester.get_list(response)
+        if self.id_property:
+            return {item.get(self.id_property): item for item in items}
+        return {json.dumps(item, sort_keys=True): item for item in items}
+
+    def get_queries(self):
+        queries = {}
+        for test in self.list_tester.tests:
+            if isinstance(test, BaseParamTest):
+                queries.setdefault(tuple(sorted(test.query.items())), test.query)
+        keys = sorted(queries)
+        if self.sample_size is not None:
+            keys = sorted(self.random.sample(keys, min(self.sample_size, len(keys))))
+        return [{}] + [queries[key] for key in keys]
+
+    @property
+    def differential_tests(self):
+        return [test for test in self.tests if isinstance(test, DifferentialTest)]
+
+    def _build_tests(self):
+        groups = set()
+        for query in self.get_queries():
+            test = DifferentialTest(suite=self, query=query)
+            groups.update(get_query_groups(test))
+            yield test
+        for group in sorted(groups):
+            yield CandidateLatencyTest(suite=self, group=group)
+
+    @cached_property
+    def tests(self):
+        return list(self._build_tests())
+
+    def replan(self):
+        self.__dict__.pop('tests', None)
+
+    def get_report_detail(self):
+        detail = {
+            'reference endpoint': self.endpoint,
+            'candidate endpoint': self.candidate_endpoint,
+        }
+        compared = [test for test in self.differential_tests if test.reference and test.candidate]
+        if compared:
+            detail['queries diverged'] = '%d/%d' % (sum(1 for test in compared if test.errors), len(compared))
+            detail['median latency (msec)'] = 'candidate %.1f; reference %.1f' % (
+                statistics.median(test.candidate['duration'] for test in compared) * 1000,
+                statistics.median(test.reference['duration'] for test in compared) * 1000,
+            )
+        return detail
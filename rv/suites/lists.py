@@ -2,11 +2,10 @@ import random
 from collections import Counter
 from urllib.parse import urlparse
 
-import jsonschema
-import requests
-
+from rv.instrumentation import counters
+from rv.oracle import BaselineIndex
 from rv.suites.base import RequestSuite
-from rv.tests.params import MultipleParamsTest, SingleParamTest
+from rv.tests.params import BaseParamTest, MultipleParamsTest, SingleParamTest
 from rv.tests.validation import ValidationTest
 from rv.utils import cached_property, wallclock
 
@@ -27,8 +26,20 @@ class Limits(object):
 
 class ListTester(RequestSuite):
     description = "Test that filters work in a list endpoint"
+    max_sample_size = 10000
 
-    def __init__(self, *, endpoint, schema, parameters, name=None, limits=None):
+    def __init__(
+        self,
+        *,
+        endpoint,
+        schema,
+        parameters,
+        name=None,
+        limits=None,
+        id_property=None,
+        refresh_param=None,
+        sampling=None
+    ):
         """
         Initialize the list tester.
 
@@ -37,21 +48,52 @@ class ListTester(RequestSuite):
         :param parameters: List of `Param` objects to use for test generation.
         :param name: The suite's name. One can also be autogenerated.
         :param limits: A `Limits` object, should one wish to customize the limits of test generation.
+        :param id_property: The property identifying items. If set, the baseline is indexed
+                            and the param tests also check that no expected items are missing.
+        :param refresh_param: One of the `parameters` (such as an "updated after" `DateTimeParam`) with which
+                              the items changed since the newest one in the baseline can be requested;
+                              see `refresh_baseline`. Requires `id_property`.
+        :param sampling: A `rv.sampling.SamplingPolicy`, should one wish to check only a sample
+                         of the items of large responses.
         """
+        if refresh_param and not id_property:
+            raise ValueError('refresh_param requires id_property, to merge the changed items into the baseline')
+        if refresh_param and refresh_param not in parameters:
+            raise ValueError('refresh_param must be one of the parameters, as the baseline\'s values are counted')
         if not name:
             name = urlparse(endpoint).path.replace('.', '_').strip('/')
         super(ListTester, self).__init__(name=name)
-        self.session = requests.Session()
         self.endpoint = endpoint
         self.schema = schema
         self.parameters = parameters
         self.limits = (limits or Limits())
+        self.id_property = id_property
+        self.refresh_param = refresh_param
+        self.sampling = sampling
 
     def get_report_detail(self):
-        return dict(
+        detail = dict(
             vars(self.limits),
             endpoint=self.endpoint,
         )
+        if self.sampling:
+            detail['sampling'] = str(self.sampling)
+        return detail
+
+    def get_coverage(self):
+        coverage = super(ListTester, self).get_coverage()
+        if coverage:
+            covered = {
+                param.parameter
+                for test in self.tests
+                if isinstance(test, BaseParamTest) and test.has_been_run
+                for param in test.params_to_values
+            }
+            uncovered = sorted({param.parameter for param in self.parameters} - covered)
+            coverage['parameters covered'] = '%d/%d' % (len(covered), len(covered) + len(uncovered))
+            if uncovered:
+                coverage['parameters not covered'] = ', '.join(uncovered)
+        return coverage
 
     def peel(self, data):
         """
@@ -65,7 +107,8 @@ class ListTester(RequestSuite):
         return data
 
     def get_list(self, response):
-        items = self.peel(response.json())
+        with counters.timer('decode'):
+            items = self.peel(response.json())
         return items
 
     def validate(self, item):
@@ -80,6 +123,7 @@ class ListTester(RequestSuite):
     @cached_property
     def validator(self):
         if self.schema:
+            import jsonschema
             return jsonschema.Draft4Validator(self.schema)
         return None
 
@@ -93,8 +137,20 @@ class ListTester(RequestSuite):
         items = self.get_list(self.request("GET", self.endpoint))
         self.baseline_duration = wallclock() - start_time
         assert isinstance(items, list), 'baseline response not a list'
+        self.baseline_response_size = len(items)  # The baseline may grow when refreshed; this does not
         return items
 
+    @cached_property
+    def baseline_value_counts(self):
+        """
+        A mapping of parameter to the counts of its values in the baseline items.
+        :rtype: dict[Param, Counter]
+        """
+        counts = {param: Counter() for param in self.parameters}
+        for item in self.baseline_items:
+            self._count_values(counts, item, 1)
+        return counts
+
     @cached_property
     def baseline_values(self):
         """
@@ -102,14 +158,135 @@ class ListTester(RequestSuite):
         :rtype: dict[Param, list[object]]
         """
         values = {}
-        for param in self.parameters:
-            param_vals = param.get_values(self.baseline_items)
-            if not param_vals:
+        for param, param_counts in self.baseline_value_counts.items():
+            if not param_counts:
                 self.log.info('no values for %s', param)
                 continue
-            values[param] = sorted(param_vals, key=str)
+            values[param] = sorted(param_counts, key=str)
         return values
 
+    @cached_property
+    def baseline_samples(self):
+        """
+        A mapping of continuous parameter to a sorted sample of the distribution of its baseline values
+        (all of them, or for big baselines, `max_sample_size` evenly spaced order statistics).
+        :rtype: dict[Param, list[object]]
+        """
+        samples = {}
+        for param, param_counts in self.baseline_value_counts.items():
+            if param.discrete or not param_counts:
+                continue
+            sample = sorted(param_counts.elements())
+            if len(sample) > self.max_sample_size:
+                step = len(sample) / self.max_sample_size
+                sample = [sample[int(i * step)] for i in range(self.max_sample_size)] + [sample[-1]]
+            samples[param] = sample
+        return samples
+
+    def _count_values(self, counts, item, delta):
+        """
+        Add `delta` to the counts of the item's values.
+
+        :return: The params whose set of values changed.
+        :rtype: set[Param]
+        """
+        changed_params = set()
+        for param, param_counts in counts.items():
+            if param.property not in item:
+                continue
+            value = param.get_value(item)
+            if value not in param_counts:
+                changed_params.add(param)
+            param_counts[value] += delta
+            if param_counts[value] <= 0:
+                del param_counts[value]
+                changed_params.add(param)
+        return changed_params
+
+    @cached_property
+    def baseline_positions(self):
+        """
+        A mapping of item ID to position in `baseline_items`.
+        :rtype: dict[object, int]
+        """
+        return {item.get(self.id_property): position for (position, item) in enumerate(self.baseline_items)}
+
+    def refresh_baseline(self):
+        """
+        Request the items changed since the newest change in the baseline (using `refresh_param`)
+        and merge them into the baseline, updating `baseline_values` incrementally.
+
+        As the response may be truncated to a page, `refresh_param` is advanced to the newest change received
+        and the items changed since then requested again, until a page shorter than the baseline response
+        (so not truncated) comes back, or the newest change no longer advances.
+
+        :return: The number of changed items received.
+        :rtype: int
+        """
+        param = self.refresh_param
+        if not (param and self.baseline_value_counts[param]):
+            return 0
+        first_since = since = max(self.baseline_value_counts[param])
+        changed_params = set()
+        changed_ids = set()  # As `refresh_param` is typically inclusive, pages may overlap
+        while True:
+            response = self.request('GET', self.endpoint, params={param.parameter: param.to_wire(since)})
+            response.raise_for_status()
+            changed_items = self.get_list(response)
+            changed_params |= self._merge_changed_items(changed_items)
+            changed_ids.update(item.get(self.id_property) for item in changed_items)
+            newest = max(self.baseline_value_counts[param])
+            if len(changed_items) < self.baseline_response_size or newest <= since:
+                break
+            since = newest
+        for param in changed_params:
+            self.baseline_values[param] = sorted(self.baseline_value_counts[param], key=str)
+        if changed_ids:  # These are rebuilt lazily
+            self.__dict__.pop('baseline_samples', None)
+            self.__dict__.pop('baseline_index', None)
+        self.log.info('refreshed %d items changed since %s', len(changed_ids), first_since)
+        return len(changed_ids)
+
+    def _merge_changed_items(self, changed_items):
+        """
+        Merge the given changed items into the baseline, updating `baseline_value_counts`.
+
+        :return: The params whose set of values changed.
+        :rtype: set[Param]
+        """
+        counts = self.baseline_value_counts
+        changed_params = set()
+        for item in changed_items:
+            id = item.get(self.id_property)
+            position = self.baseline_positions.get(id)
+            if position is None:
+                self.baseline_positions[id] = len(self.baseline_items)
+                self.baseline_items.append(item)
+            else:
+                changed_params |= self._count_values(counts, self.baseline_items[position], -1)
+                self.baseline_items[position] = item
+            changed_params |= self._count_values(counts, item, 1)
+        return changed_params
+
+    def refresh(self):
+        return self.refresh_baseline()
+
+    def replan(self):
+        self.__dict__.pop('tests', None)
+
+    @cached_property
+    def baseline_index(self):
+        """
+        An index over the baseline items, if an `id_property` is set.
+        :rtype: rv.oracle.BaselineIndex|None
+        """
+        if not self.id_property:
+            return None
+        start_time = wallclock()
+        index = BaselineIndex(self.baseline_items, self.parameters, self.id_property)
+        self.log.info('indexed %d baseline items in %.2f sec', len(index), wallclock() - start_time)
+        return index
+
     def _build_tests(self):
         if not self.baseline_items:
             raise ValueError('no baseline, unable to test test anything.')
@@ -124,22 +301,13 @@ class ListTester(RequestSuite):
         yield from self._build_multi_param_tests()
 
     def _build_single_param_tests(self):
-        prop_values = self.baseline_values
-        param_to_values = {
-            param: param.embucket(prop_values[param])
-            for param
-            in self.parameters
-        }
         limit = self.limits.max_single_tests_per_param
-        for param, values in param_to_values.items():
+        for param in self.parameters:
             if param.discrete:
-                test_values = param.generate_values(values, count=limit)
-            else:  # Try to avoid duplicate tests here
-                test_values = set()
-                generator = param.generate_values(values, count=limit)
-                while len(test_values) < min(len(values), (limit or 9000)):
-                    test_values.add(next(generator))
-            for value in test_values:
+                values = param.embucket(self.baseline_values.get(param, ()))
+            else:
+                values = self.baseline_samples.get(param, ())
+            for value in param.generate_values(values, count=limit):
                 yield SingleParamTest(suite=self, param=param, value=value)
 
     def _build_multi_param_tests(self):
@@ -173,6 +341,33 @@ class ListTester(RequestSuite):
             )
             n_tests += 1
 
+    def serialize_test(self, test):
+        if not isinstance(test, BaseParamTest):
+            return None
+        return {
+            'type': test.type,
+            'params': [
+                [self.parameters.index(param), param.dump_value(value)]
+                for (param, value)
+                in test.params_to_values.items()
+            ],
+            'min_expected': getattr(test, 'min_expected', 0),
+        }
+
+    def deserialize_test(self, spec):
+        params_to_values = {}
+        for index, value in spec['params']:
+            param = self.parameters[index]
+            params_to_values[param] = param.load_value(value)
+        if spec['type'] == 'SingleParam':
+            ((param, value),) = params_to_values.items()
+            return SingleParamTest(suite=self, param=param, value=value)
+        return MultipleParamsTest(
+            suite=self,
+            params_to_values=params_to_values,
+            min_expected=spec.get('min_expected', 0),
+        )
+
     @cached_property
     def tests(self):
         return list(self._build_tests())
@@ -0,0 +1,28 @@
+from rv.suites.base import Suite
+
+
+class RecordedSuite(Suite):
+    """
+    A suite of `RecordedTest`s, e.g. read back from result files.
+    """
+
+    def __init__(self, *, name, description='', detail=None):
+        super(RecordedSuite, self).__init__(name=name)
+        self.description = description
+        self.detail = dict(detail or {})
+        self._tests = []
+
+    @property
+    def tests(self):
+        return self._tests
+
+    def add_test(self, test):
+        self._tests.append(test)
+
+    def get_report_detail(self):
+        return self.detail
+
+    def run(self, on_test_finished=None, events=None):
+        """
+        Recorded suites have already been run; there's nothing to do.
+        """
@@ -0,0 +1,72 @@
+from rv.history import get_latency_samples
+from rv.suites.base import Suite
+from rv.tests.regression import LatencyComparisonTest
+
+
+class RegressionSuite(Suite):
+    """
+    Compares the latency distributions of the query groups of (already run) suites
+    against those of a baseline run from the history store.
+    """
+    description = "Test that latencies have not regressed since a baseline run"
+
+    def __init__(self, *, suites, baseline_run, alpha=0.01, min_effect=0.1, min_samples=5, name=None):
+        """
+        :param suites: The suites (already run) to compare.
+        :param baseline_run: A run dict, as loaded from a `HistoryStore`.
+        :param alpha: Significance level for the Mann-Whitney U test.
+        :param min_effect: The minimum relative increase in median latency considered a regression.
+        :param min_samples: The minimum number of samples on both sides for a comparison to be made.
+        :param name: The suite's name. One can also be autogenerated.
+        """
+        self.baseline_run_id = baseline_run.get('id', '?')
+        super(RegressionSuite, self).__init__(name=(name or 'latency regressions vs. %s' % self.baseline_run_id))
+        self.suites = suites
+        self.baseline_run = baseline_run
+        self.alpha = alpha
+        self.min_effect = min_effect
+        self.min_samples = min_samples
+        self.incomparable_groups = []  # Query groups whose samples are of a different kind than the baseline's
+        self._tests = None
+
+    @property
+    def tests(self):
+        if self._tests is None:
+            self._tests = list(self._build_tests())
+        return self._tests
+
+    def _build_tests(self):
+        for suite in self.suites:
+            baseline = self.baseline_run['suites'].get(suite.name, {})
+            baseline_groups = baseline.get('groups', {})
+            baseline_kinds = baseline.get('sample_kinds', {})  # Runs stored without kinds only had test durations
+            latency_samples = get_latency_samples(suite)
+            for group, samples in sorted(latency_samples['groups'].items()):
+                if group not in baseline_groups:
+                    continue
+                name = ('%s %s' % (suite.name, group) if len(self.suites) > 1 else group)
+                kind = latency_samples['sample_kinds'][group]
+                baseline_kind = baseline_kinds.get(group, 'test')
+                if kind != baseline_kind:
+                    self.log.warning(
+                        'not comparing %s: its samples are %s latencies, the baseline\'s %s latencies',
+                        name, kind, baseline_kind,
+                    )
+                    self.incomparable_groups.append(name)
+                    continue
+                yield LatencyComparisonTest(
+                    suite=self,
+                    group=name,
+                    samples=samples,
+                    baseline_samples=baseline_groups[group],
+                )
+
+    def get_report_detail(self):
+        detail = {
+            'baseline run': self.baseline_run_id,
+            'alpha': self.alpha,
+            'minimum effect': self.min_effect,
+        }
+        if self.incomparable_groups:
+            detail['not compared (different sample kinds)'] = ', '.join(self.incomparable_groups)
+        return detail
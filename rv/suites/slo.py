@@ -0,0 +1,51 @@
+from rv.slo import get_latency, get_test_groups
+from rv.suites.base import Suite
+from rv.tests.slo import SLOTest
+
+
+class SLOSuite(Suite):
+    """
+    Evaluates latency SLOs against the latencies of (already run) suites.
+    """
+    description = "Test that latencies meet their service level objectives"
+
+    def __init__(self, *, suites, slos, name='latency SLOs'):
+        """
+        :param suites: The suites (already run) to evaluate.
+        :param slos: The `LatencySLO`s to evaluate; see `rv.slo.SLOMonitor`.
+        :param name: The suite's name.
+        """
+        super(SLOSuite, self).__init__(name=name)
+        self.suites = suites
+        self.slos = slos
+        self._tests = None
+
+    @property
+    def tests(self):
+        if self._tests is None:
+            self._tests = list(self._build_tests())
+        return self._tests
+
+    def get_samples(self):
+        """
+        Gather the latencies of the run suites by query group.
+
+        :rtype: dict[str, list[float]]
+        """
+        samples = {}
+        for suite in self.suites:
+            baseline_duration = getattr(suite, 'baseline_duration', None)
+            if baseline_duration is not None:
+                samples.setdefault('baseline', []).append(baseline_duration)
+            for test in suite.tests:
+                latency = get_latency(test)
+                if latency is None:
+                    continue
+                for group in get_test_groups(test):
+                    samples.setdefault(group, []).append(latency)
+        return samples
+
+    def _build_tests(self):
+        samples = self.get_samples()
+        for slo in self.slos:
+            yield SLOTest(suite=self, slo=slo, samples=samples.get(slo.group, []))
@@ -0,0 +1,134 @@
+import json
+from urllib.parse import urlparse
+
+from rv.suites.base import RequestSuite
+from rv.tests.wire import CachingHeadersTest, CompressionTest, PageSizeTest, PayloadSizeTest
+from rv.utils import cached_property, wallclock
+
+
+class WireThresholds(object):
+
+    def __init__(
+        self,
+        *,
+        max_bytes_per_item=None,
+        min_compression_ratio=None,
+        max_seconds_per_item=None,
+        require_compression=True,
+        require_caching_headers=True
+    ):
+        """
+        :param max_bytes_per_item: The maximum uncompressed bytes per item.
+        :param min_compression_ratio: The minimum ratio of uncompressed to compressed bytes.
+        :param max_seconds_per_item: The maximum request latency per item, in seconds, for any page size.
+        :param require_compression: Whether the endpoint not compressing with an accepted encoding is an error.
+        :param require_caching_headers: Whether missing caching headers are an error.
+        """
+        self.max_bytes_per_item = max_bytes_per_item
+        self.min_compression_ratio = min_compression_ratio
+        self.max_seconds_per_item = max_seconds_per_item
+        self.require_compression = require_compression
+        self.require_caching_headers = require_caching_headers
+
+
+class WireEfficiencySuite(RequestSuite):
+    description = "Test that a list endpoint's responses are compact, compressed and cacheable"
+
+    def __init__(
+        self,
+        *,
+        endpoint,
+        name=None,
+        encodings=('gzip', 'br'),
+        page_size_param='page_size',
+        page_sizes=(10, 50, 100, 500),
+        thresholds=None
+    ):
+        """
+        Initialize the wire efficiency suite.
+
+        :param endpoint: The HTTP endpoint URL to test against.
+        :param name: The suite's name. One can also be autogenerated.
+        :param encodings: The content encodings to test compression with.
+        :param page_size_param: The parameter for the page size, or None if the endpoint does not page.
+        :param page_sizes: The page sizes to sweep through.
+        :param thresholds: A `WireThresholds` object, should one wish to customize what counts as an error.
+        """
+        if not name:
+            name = 'wire efficiency of %s' % urlparse(endpoint).path.replace('.', '_').strip('/')
+        super(WireEfficiencySuite, self).__init__(name=name)
+        self.endpoint = endpoint
+        self.encodings = encodings
+        self.page_size_param = page_size_param
+        self.page_sizes = page_sizes
+        self.thresholds = (thresholds or WireThresholds())
+
+    def get_report_detail(self):
+        return dict(
+            {key: value for (key, value) in vars(self.thresholds).items() if value is not None},
+            endpoint=self.endpoint,
+        )
+
+    def peel(self, data):
+        """
+        "Peel" incoming data to a list; see `ListTester.peel`.
+        """
+        return data
+
+    def get_list(self, body):
+        return self.peel(json.loads(body.decode('utf-8')))
+
+    def fetch_raw(self, params=None, encoding='identity'):
+        """
+        Request the endpoint, accepting the given content encoding, and read the body as it was on the wire.
+
+        :return: The response, its (possibly compressed) body, and the duration of the request
+        :rtype: tuple[requests.Response, bytes, float]
+        """
+        start_time = wallclock()
+        response = self.request(
+            'GET',
+            self.endpoint,
+            params=(params or {}),
+            headers={'Accept-Encoding': encoding},
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+            body = response.raw.read(decode_content=False)
+        finally:
+            response.close()
+        return (response, body, wallclock() - start_time)
+
+    @cached_property
+    def uncompressed(self):
+        """
+        Measurements of an uncompressed response: `bytes`, `items`, `bytes_per_item`, `duration` and `headers`.
+        :rtype: dict
+        """
+        response, body, duration = self.fetch_raw()
+        items = len(self.get_list(body))
+        return {
+            'bytes': len(body),
+            'items': items,
+            'bytes_per_item': (len(body) / items if items else 0),
+            'duration': duration,
+            'headers': response.headers,
+        }
+
+    def refresh(self):
+        self.__dict__.pop('uncompressed', None)
+        return 0
+
+    def _build_tests(self):
+        yield PayloadSizeTest(suite=self)
+        yield CachingHeadersTest(suite=self)
+        for encoding in self.encodings:
+            yield CompressionTest(suite=self, encoding=encoding)
+        if self.page_size_param:
+            for page_size in self.page_sizes:
+                yield PageSizeTest(suite=self, page_size=page_size)
+
+    @cached_property
+    def tests(self):
+        return list(self._build_tests())
@@ -1,8 +1,15 @@
+import logging
+import time
+import tracemalloc
+from collections import defaultdict
 from uuid import uuid4
 
 from rv.excs import WrappedTestException, TestException
+from rv.instrumentation import counters
 from rv.utils import wallclock
 
+log = logging.getLogger(__name__)
+
 
 class Test(object):
     """
@@ -14,13 +21,25 @@ class Test(object):
     name = "Some Test"
     description = ""
     url = ""
+    query = None
+    request_duration = None  # The duration of the HTTP request(s) made, if any, in seconds
+    response_bytes = None  # The number of (decoded) bytes received, if any
+    num_requests = 0  # The number of HTTP requests running the test makes
+    deferred = False  # Whether the test uses the results of the other tests of its suite, and so must run last
+    repeatable = False  # Whether `time_request` can re-issue the test's request; see `rv.repeat`
 
     def __init__(self, suite):
         self.id = 't%s' % uuid4()
         self.suite = suite
         self.has_been_run = False
         self.errors = None
+        self.started = None
         self.duration = None
+        self.memory_peak = None
+        self.skipped = False  # Set if the test was not run due to e.g. a budget
+        self.sample = None  # The `ItemSample` of the items checked, if any
+        self.latency_samples = None  # Repeated latency measurements (see `rv.repeat`), if any
+        self.repetition_error = None  # Why the repeated measurements failed, if they did
 
     def run(self):
         """
@@ -33,6 +52,11 @@ class Test(object):
         :return: True if no errors were found, False otherwise.
         """
         if not self.has_been_run:
+            self.started = time.time()
+            tracing = (self.suite.trace_memory and tracemalloc.is_tracing())
+            if tracing:
+                tracemalloc.reset_peak()
+                memory_before = tracemalloc.get_traced_memory()[0]
             start_time = wallclock()
             errors = []
             try:
@@ -41,9 +65,40 @@ class Test(object):
                 errors.append(WrappedTestException(test=self, exception=exc))
             self.errors = errors
             self.duration = wallclock() - start_time
+            if tracing:  # Only count memory allocated on top of what was in use already
+                self.memory_peak = tracemalloc.get_traced_memory()[1] - memory_before
+            if self.suite.repetition:  # Not part of the test proper: excluded from its duration and memory peak
+                self.repeat()
             self.has_been_run = True
         return not bool(self.errors)
 
+    def repeat(self):
+        """
+        Take the repeated latency measurements (see `rv.repeat`).
+
+        As the responses of the repeated requests are not checked, a failure is not an error of
+        the test; it is logged and kept in `repetition_error`, and the test has no latency samples.
+        """
+        try:
+            self.latency_samples = self.suite.repetition.measure(self)
+        except Exception as exc:
+            log.warning('repeating %s failed: %s', self.name, exc)
+            self.repetition_error = '%s: %s' % (exc.__class__.__name__, exc)
+
+    def reset(self):
+        """
+        Forget the results of a previous run, so the test may be run again.
+        """
+        self.has_been_run = False
+        self.errors = None
+        self.started = None
+        self.duration = None
+        self.memory_peak = None
+        self.skipped = False
+        self.sample = None
+        self.latency_samples = None
+        self.repetition_error = None
+
     def execute(self):
         """
         Actually execute the test.
@@ -56,12 +111,87 @@ class Test(object):
         """
         yield TestException(self, '%s has not been implemented' % self.__class__.__name__)
 
+    def time_request(self):
+        """
+        Re-issue the test's request (without checking the response), for repeated latency measurements.
+
+        Only called for `repeatable` tests.
+
+        :return: The duration of the request in seconds.
+        :rtype: float
+        """
+        raise NotImplementedError('implement me in a subclass')
+
+    def get_latency_stats(self):
+        """
+        Describe the distribution of the repeated latency measurements, if any; see `rv.stats.describe`.
+
+        :rtype: dict|None
+        """
+        if not self.latency_samples:
+            return None
+        from rv.stats import describe
+        return describe(self.latency_samples)
+
+    def check_items(self, items):
+        """
+        Check the given items with `check_item`; all of them, or a sample
+        if the suite has a sampling policy (see `rv.sampling`).
+
+        :return: Iterable of exceptions
+        :rtype: Iterable[TestException]
+        """
+        from rv.sampling import ItemSample
+        self.sample = ItemSample(self.suite.sampling, items)
+        self.check_times = defaultdict(float)
+        errors = list(self.sample.iter_errors(self.check_item))
+        for name, duration in self.check_times.items():  # Added up here, as timers per item would cost too much
+            counters.add(name, duration, count=self.sample.num_checked)
+        return errors
+
+    def check_item(self, item):
+        """
+        Check a single item.
+
+        :return: List of exceptions
+        :rtype: list[TestException]
+        """
+        raise NotImplementedError('implement me in a subclass')
+
     def get_report_detail(self):
         """
         Get a dict (or a sorted dict?) of any additional "detail" that is worthwhile to show in a report.
         """
         return {}
 
+    def get_record(self):
+        """
+        Get a compact, JSON-serializable record of this test and its results.
+
+        See `rv.tests.recorded.RecordedTest` for the inverse.
+
+        :rtype: dict
+        """
+        return {
+            'name': self.name,
+            'type': self.type,
+            'description': self.description,
+            'url': self.url,
+            'query': self.query,
+            'started': self.started,
+            'duration': self.duration,
+            'memory_peak': self.memory_peak,
+            'request_duration': self.request_duration,
+            'response_bytes': self.response_bytes,
+            'latency_samples': self.latency_samples,
+            'repetition_error': self.repetition_error,
+            'detail': self.get_report_detail(),
+            'errors': [
+                {'type': error.type_name, 'message': str(error)}
+                for error in (self.errors or ())
+            ],
+        }
+
     @property
     def type(self):
         """
@@ -0,0 +1,196 @@
+import hashlib
+import statistics
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+
+from rv.excs import CachingError
+from rv.tests.base import Test
+from rv.utils import wallclock
+
+
+def to_utc(dt):
+    """
+    Convert the given datetime to an aware UTC one, assuming naive datetimes are in UTC (as HTTP dates are).
+    """
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class ConditionalGetTest(Test):
+    """
+    Test that re-requesting a query with the validators (`ETag`, `Last-Modified`) of a full response
+    gets a (fast) `304 Not Modified`, and that the validators are consistent with the items.
+    """
+
+    def __init__(self, suite, query):
+        super(ConditionalGetTest, self).__init__(suite)
+        self.query = query
+        self.full = None
+        self.conditional = {}  # header name -> measurement
+
+    @property
+    def name(self):
+        return 'Conditional: %s' % (','.join('%s=%s' % pair for pair in sorted(self.query.items())) or '(no filters)')
+
+    @property
+    def query_key(self):
+        return tuple(sorted(self.query.items()))
+
+    @property
+    def num_requests(self):
+        return 1 + len(self.suite.conditional_headers)
+
+    def reset(self):
+        super(ConditionalGetTest, self).reset()
+        self.full = None
+        self.conditional = {}
+
+    def measure(self, headers=None):
+        start_time = wallclock()
+        response = self.suite.request('GET', self.suite.endpoint, params=self.query, headers=(headers or {}))
+        return {
+            'status': response.status_code,
+            'duration': wallclock() - start_time,
+            'bytes': len(response.content),
+            'headers': response.headers,
+            'response': response,
+        }
+
+    def execute(self):
+        self.full = full = self.measure()
+        full['response'].raise_for_status()
+        full['body_hash'] = hashlib.sha1(full['response'].content).hexdigest()
+        self.request_duration = full['duration']
+        self.response_bytes = full['bytes']
+        newest = self.get_newest_update(full)
+        yield from self.check_last_modified(full, newest)
+        yield from self.check_validators_changed(full, newest)
+        validators = {
+            'If-None-Match': full['headers'].get('ETag'),
+            'If-Modified-Since': full['headers'].get('Last-Modified'),
+        }
+        for header in self.suite.conditional_headers:
+            if not validators[header]:
+                continue
+            self.conditional[header] = measurement = self.measure({header: validators[header]})
+            if measurement['status'] != 304:
+                if self.suite.require_not_modified:
+                    yield CachingError(
+                        test=self,
+                        message='%s: %s got %d instead of 304' % (header, validators[header], measurement['status']),
+                    )
+                continue
+            if measurement['bytes']:
+                yield CachingError(test=self, message='%s: 304 response had a body' % header)
+            etag = measurement['headers'].get('ETag')
+            if etag and etag != full['headers'].get('ETag'):
+                yield CachingError(test=self, message='%s: 304 response had a different ETag %s' % (header, etag))
+
+    def get_newest_update(self, full):
+        """
+        Get the newest update time (in UTC, to the second) of the items of the given full response.
+
+        :rtype: datetime.datetime|None
+        """
+        param = self.suite.updated_param
+        if not param:
+            return None
+        items = self.suite.list_tester.get_list(full['response'])
+        updated = [to_utc(param.get_value(item)) for item in items if param.property in item]
+        if not updated:
+            return None
+        return max(updated).replace(microsecond=0)  # Last-Modified has a resolution of a second
+
+    def check_last_modified(self, full, newest):
+        """
+        Check that `Last-Modified` does not predate any returned item's last update.
+        """
+        last_modified = full['headers'].get('Last-Modified')
+        if not (newest and last_modified):
+            return
+        try:
+            last_modified = to_utc(parsedate_to_datetime(last_modified))
+        except (TypeError, ValueError):
+            yield CachingError(test=self, message='unparseable Last-Modified %r' % last_modified)
+            return
+        if last_modified < newest:
+            yield CachingError(
+                test=self,
+                message='Last-Modified %s predates an item updated at %s' % (last_modified, newest),
+            )
+
+    def check_validators_changed(self, full, newest):
+        """
+        Check that the validators changed if the returned items were updated since the query was last run
+        (in a long-running mode, such as `rv.watch`).
+        """
+        current = dict(newest=newest, **{header: full['headers'].get(header) for header in ('ETag', 'Last-Modified')})
+        previous = self.suite.last_validators.get(self.query_key)
+        self.suite.last_validators[self.query_key] = current
+        if not (previous and previous['newest'] and newest) or newest == previous['newest']:
+            return
+        for header in ('ETag', 'Last-Modified'):
+            if current[header] and current[header] == previous[header]:
+                yield CachingError(
+                    test=self,
+                    message='%s %s did not change although items were updated (at %s, previously %s)' % (
+                        header,
+                        current[header],
+                        newest,
+                        previous['newest'],
+                    ),
+                )
+
+    @property
+    def hits(self):
+        return {header: m for (header, m) in self.conditional.items() if m['status'] == 304}
+
+    def get_report_detail(self):
+        if not self.full:
+            return {}
+        detail = {
+            '200 (msec)': round(self.full['duration'] * 1000, 2),
+            '200 bytes': self.full['bytes'],
+            'ETag': self.full['headers'].get('ETag', '(none)'),
+            'Last-Modified': self.full['headers'].get('Last-Modified', '(none)'),
+        }
+        for header, measurement in sorted(self.conditional.items()):
+            detail['%s (msec)' % header] = '%s: %.2f' % (measurement['status'], measurement['duration'] * 1000)
+        return detail
+
+
+class ValidatorConsistencyTest(Test):
+    """
+    Test that responses with different content never share an `ETag`,
+    and that `304 Not Modified` responses are faster than full ones.
+    """
+    name = 'Conditional: validator consistency and speed'
+    deferred = True
+
+    def execute(self):
+        tests = [test for test in self.suite.conditional_tests if test.full]
+        bodies_by_etag = {}
+        for test in tests:
+            etag = test.full['headers'].get('ETag')
+            if etag:
+                bodies_by_etag.setdefault(etag, set()).add(test.full['body_hash'])
+        for etag, body_hashes in sorted(bodies_by_etag.items()):
+            if len(body_hashes) > 1:
+                yield CachingError(test=self, message='ETag %s was given to %d different responses' % (
+                    etag,
+                    len(body_hashes),
+                ))
+        full_durations = [test.full['duration'] for test in tests if test.hits]
+        hit_durations = [m['duration'] for test in tests for m in test.hits.values()]
+        max_ratio = self.suite.max_not_modified_ratio
+        if max_ratio and full_durations and hit_durations:
+            ratio = statistics.median(hit_durations) / statistics.median(full_durations)
+            if ratio > max_ratio:
+                yield CachingError(
+                    test=self,
+                    message='304 responses took %.0f%% of the time of full responses (more than %.0f%%)' % (
+                        ratio * 100,
+                        max_ratio * 100,
+                    ),
+                )
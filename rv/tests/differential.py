@@ -0,0 +1,163 @@
+import json
+import math
+import statistics
+
+from rv.excs import Divergence, DivergentItems
+from rv.history import get_query_groups
+from rv.stats import wilcoxon_signed_rank
+from rv.tests.base import Test
+from rv.tests.regression import LatencyComparisonTest
+from rv.utils import wallclock
+
+
+class DifferentialTest(Test):
+    """
+    Test that the candidate endpoint returns the same items as the reference endpoint for a query,
+    requesting both concurrently.
+    """
+    num_requests = 2
+
+    def __init__(self, suite, query):
+        super(DifferentialTest, self).__init__(suite)
+        self.query = query
+        self.reference = None
+        self.candidate = None
+
+    @property
+    def name(self):
+        return 'Differential: %s' % (','.join('%s=%s' % pair for pair in sorted(self.query.items())) or '(no filters)')
+
+    def reset(self):
+        super(DifferentialTest, self).reset()
+        self.reference = None
+        self.candidate = None
+
+    def measure(self, endpoint):
+        start_time = wallclock()
+        response = self.suite.request('GET', endpoint, params=self.query, session=self.suite.get_session(endpoint))
+        response.content  # Read the whole response
+        return {
+            'status': response.status_code,
+            'duration': wallclock() - start_time,
+            'response': response,
+        }
+
+    def execute(self):
+        futures = [
+            self.suite.executor.submit(self.measure, endpoint)
+            for endpoint in (self.suite.endpoint, self.suite.candidate_endpoint)
+        ]
+        self.reference, self.candidate = reference, candidate = [future.result() for future in futures]
+        self.request_duration = candidate['duration']
+        self.response_bytes = len(candidate['response'].content)
+        if reference['status'] != candidate['status']:
+            yield Divergence(
+                test=self,
+                message='status %d (candidate) vs. %d (reference)' % (candidate['status'], reference['status']),
+            )
+            return
+        reference['response'].raise_for_status()
+        reference['items'] = self.suite.get_keyed_items(reference['response'])
+        candidate['items'] = self.suite.get_keyed_items(candidate['response'])
+        yield from self.diff(reference['items'], candidate['items'])
+
+    def diff(self, reference_items, candidate_items):
+        """
+        Diff the keyed items of the responses.
+        """
+        missing = reference_items.keys() - candidate_items.keys()
+        if missing:
+            yield DivergentItems(test=self, ids=self.get_ids(missing), what='missing from the candidate')
+        extra = candidate_items.keys() - reference_items.keys()
+        if extra:
+            yield DivergentItems(test=self, ids=self.get_ids(extra), what='only in the candidate')
+        if self.suite.id_property:
+            changed = {
+                key for key in (reference_items.keys() & candidate_items.keys())
+                if json.dumps(reference_items[key], sort_keys=True) != json.dumps(candidate_items[key], sort_keys=True)
+            }
+            if changed:
+                yield DivergentItems(test=self, ids=changed, what='changed in the candidate')
+
+    def get_ids(self, keys):
+        if self.suite.id_property:
+            return keys
+        return [(key if len(key) <= 60 else key[:57] + '...') for key in keys]  # Abbreviate the JSON
+
+    def get_report_detail(self):
+        detail = {}
+        for side in ('reference', 'candidate'):
+            measurement = getattr(self, side)
+            if measurement:
+                detail[side] = '%d; %s items; %.1f msec' % (
+                    measurement['status'],
+                    len(measurement['items']) if 'items' in measurement else '?',
+                    measurement['duration'] * 1000,
+                )
+        return detail
+
+
+class CandidateLatencyTest(LatencyComparisonTest):
+    """
+    Test that the candidate endpoint's latencies for a query group are not significantly worse
+    than the reference endpoint's (for the same queries, requested concurrently).
+
+    As the latencies are paired by query, they are compared with a one-sided Wilcoxon signed-rank test
+    of the per-query log latency ratios.
+    """
+    deferred = True
+
+    def __init__(self, suite, group):
+        super(CandidateLatencyTest, self).__init__(suite, group=group, samples=[], baseline_samples=[])
+
+    @property
+    def name(self):
+        return 'Candidate latency: %s' % self.group
+
+    @property
+    def description(self):
+        return (
+            'Latencies of {group} at the candidate endpoint should not be significantly (p < {alpha}) '
+            'and substantially (over {effect:.0%}) worse than at the reference endpoint'
+        ).format(alpha=self.suite.alpha, effect=self.suite.min_effect, group=self.group)
+
+    def reset(self):
+        super(CandidateLatencyTest, self).reset()
+        self.samples = []
+        self.baseline_samples = []
+        self.result = None
+
+    def execute(self):
+        self.samples = []
+        self.baseline_samples = []
+        for test in self.suite.differential_tests:
+            if test.reference and test.candidate and self.group in get_query_groups(test):
+                self.samples.append(test.candidate['duration'])
+                self.baseline_samples.append(test.reference['duration'])
+        yield from super(CandidateLatencyTest, self).execute()
+
+    def compare(self):
+        ratios = [
+            max(candidate, 1e-9) / max(reference, 1e-9)
+            for (candidate, reference) in zip(self.samples, self.baseline_samples)
+        ]
+        w, p = wilcoxon_signed_rank([math.log(ratio) for ratio in ratios])
+        return {
+            'p_value': p,
+            'median_ratio': statistics.median(ratios),
+            'cles': sum(1 if ratio > 1 else 0.5 if ratio == 1 else 0 for ratio in ratios) / len(ratios),
+        }
+
+    def get_report_detail(self):
+        if not (self.samples and self.baseline_samples):
+            return {}
+        return {
+            'queries': len(self.samples),
+            'median (msec)': 'candidate %.2f; reference %.2f' % (
+                statistics.median(self.samples) * 1000,
+                statistics.median(self.baseline_samples) * 1000,
+            ),
+            'p-value': ('%.3g' % self.result['p_value'] if self.result else 'too few samples'),
+            'median ratio': (round(self.result['median_ratio'], 3) if self.result else None),
+            'P(candidate slower)': (round(self.result['cles'], 3) if self.result else None),
+        }
@@ -1,14 +1,21 @@
-from rv.excs import ExpectedMoreItems, ParamValueError
+from time import perf_counter
+
+from rv.excs import ExpectedMoreItems, MissingItems, ParamValueError, UnexpectedItems, ValidationException
 from rv.tests.base import Test
-from rv.tests.validation import ValidationTest
+from rv.utils import wallclock
 
 
 class BaseParamTest(Test):
+    num_requests = 1
+    repeatable = True
 
     def __init__(self, suite):
         super().__init__(suite)
         self.response = None
         self.items = None
+        self.num_expected = None
+        self.request_duration = None
+        self.response_bytes = None
 
     @property
     def url(self):
@@ -16,10 +23,95 @@ class BaseParamTest(Test):
             return self.response.request.url
         return None
 
+    @property
+    def query(self):
+        """
+        Get the query parameters (in wire format) this test sends.
+        :rtype: dict[str, str]
+        """
+        raise NotImplementedError('implement me in a subclass')
+
+    def reset(self):
+        super(BaseParamTest, self).reset()
+        self.response = None
+        self.items = None
+        self.num_expected = None
+        self.request_duration = None
+        self.response_bytes = None
+
+    def fetch(self):
+        """
+        Request the endpoint with this test's query, timing the request itself.
+
+        :return: The list of items received
+        :rtype: list[dict]
+        """
+        start_time = wallclock()
+        self.response = self.suite.request('GET', self.suite.endpoint, params=self.query)
+        self.request_duration = wallclock() - start_time
+        self.response_bytes = len(self.response.content)
+        self.response.raise_for_status()
+        return self.suite.get_list(self.response)
+
+    def time_request(self):
+        start_time = wallclock()
+        response = self.suite.request('GET', self.suite.endpoint, params=self.query)
+        response.content  # Read the whole response
+        return wallclock() - start_time
+
+    def check_completeness(self, items):
+        """
+        Check the returned items against the items the suite's baseline index
+        (if it has one) says should be returned.
+
+        Missing items are only looked for if the response is smaller than the baseline response,
+        since a bigger response may well have been truncated by paging.
+        """
+        index = self.suite.baseline_index
+        if not index:
+            return
+        self.num_expected = index.count(self.params_to_values)
+        returned_ids = {item.get(index.id_property) for item in items}
+        matches = {id: index.matches(id, self.params_to_values) for id in returned_ids}
+        unexpected_ids = [id for (id, match) in matches.items() if match is False]
+        if unexpected_ids:
+            yield UnexpectedItems(test=self, ids=unexpected_ids)
+        if len(items) >= self.suite.baseline_response_size:
+            return
+        if sum(1 for match in matches.values() if match) < self.num_expected:
+            missing_ids = set(index.find(self.params_to_values)) - returned_ids
+            yield MissingItems(test=self, ids=missing_ids)
+
+    def check_item(self, item):
+        """
+        Check that the item matches the params, and validate it.
+        """
+        start_time = perf_counter()
+        mismatches = []
+        for param, exp_value in self.params_to_values.items():
+            item_value = param.get_value(item)
+            if not param.operator(item_value, exp_value):
+                mismatches.append((param, exp_value, item_value))
+        checked_time = perf_counter()
+        validation_errors = list(self.suite.validate(item))
+        self.check_times['param check'] += checked_time - start_time
+        self.check_times['validate'] += perf_counter() - checked_time
+        errors = [
+            ParamValueError(test=self, item=item, item_value=item_value, param=param, expected_value=exp_value)
+            for (param, exp_value, item_value) in mismatches
+        ]
+        errors.extend(ValidationException(test=self, item=item, error=err) for err in validation_errors)
+        return errors
+
     def get_report_detail(self):
-        return {
+        detail = {
             'num_items': len(self.items or ()),
         }
+        if self.num_expected is not None:
+            detail['num_expected'] = self.num_expected
+        if self.sample:
+            detail.update(self.sample.get_report_detail())
+        return detail
 
 
 class SingleParamTest(BaseParamTest):
@@ -33,25 +125,21 @@ class SingleParamTest(BaseParamTest):
         self.param = param
         self.value = value
 
+    @property
+    def params_to_values(self):
+        return {self.param: self.value}
+
+    @property
+    def query(self):
+        return {self.param.parameter: self.param.to_wire(self.value)}
+
     def execute(self):
-        param = self.param
-        query = {param.parameter: param.to_wire(self.value)}
-        self.response = self.suite.request('GET', self.suite.endpoint, params=query)
-        self.response.raise_for_status()
-        self.items = items = self.suite.get_list(self.response)
+        self.items = items = self.fetch()
         if not items:
             yield ExpectedMoreItems(test=self)
         self.suite.log.debug('testing %s against %d items' % (self.name, len(items)))
-        for item in items:
-            item_value = param.get_value(item)
-            if not param.operator(item_value, self.value):
-                yield ParamValueError(test=self, item=item, item_value=item_value)
-
-        yield from ValidationTest(
-            suite=self.suite,
-            validate=self.suite.validate,
-            items=items
-        ).execute()
+        yield from self.check_items(items)
+        yield from self.check_completeness(items)
 
     @property
     def name(self):
@@ -84,32 +172,24 @@ class MultipleParamsTest(BaseParamTest):
         self.params_to_values = params_to_values
         self.min_expected = min_expected
 
-    def execute(self):
-        query = {
+    @property
+    def query(self):
+        return {
             param.parameter: param.to_wire(value)
             for (param, value)
             in self.params_to_values.items()
         }
-        self.response = self.suite.request('GET', self.suite.endpoint, params=query)
-        self.response.raise_for_status()
-        self.items = items = self.suite.get_list(self.response)
+
+    def execute(self):
+        self.items = items = self.fetch()
         if len(items) < self.min_expected:
             yield ExpectedMoreItems(
                 test=self,
                 message='expected at least %d items, got %d' % (self.min_expected, len(items))
             )
         self.suite.log.debug('testing %s against %d items' % (self.name, len(items)))
-        for item in items:
-            for param, exp_value in self.params_to_values.items():
-                item_value = param.get_value(item)
-                if not param.operator(item_value, exp_value):
-                    yield ParamValueError(test=self, item=item, item_value=item_value)
-
-        yield from ValidationTest(
-            suite=self.suite,
-            validate=self.suite.validate,
-            items=items
-        ).execute()
+        yield from self.check_items(items)
+        yield from self.check_completeness(items)
 
     @property
     def name(self):
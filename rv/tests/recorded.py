@@ -0,0 +1,41 @@
+from rv.excs import RecordedError
+from rv.tests.base import Test
+
+
+class RecordedTest(Test):
+    """
+    A test whose results were recorded elsewhere (by a worker process, say),
+    reconstituted from a record returned by `Test.get_record()`.
+
+    Recorded tests have, by definition, already been run.
+    """
+
+    def __init__(self, suite, record):
+        super(RecordedTest, self).__init__(suite)
+        self.record = record
+        self.name = record['name']
+        self.description = record.get('description') or ''
+        self.url = record.get('url') or ''
+        self.query = record.get('query')
+        self.started = record.get('started')
+        self.duration = record.get('duration')
+        self.memory_peak = record.get('memory_peak')
+        self.request_duration = record.get('request_duration')
+        self.response_bytes = record.get('response_bytes')
+        self.latency_samples = record.get('latency_samples')
+        self.repetition_error = record.get('repetition_error')
+        self.errors = [
+            RecordedError(test=self, type_name=error['type'], message=error['message'])
+            for error in record.get('errors', ())
+        ]
+        self.has_been_run = True
+
+    def execute(self):
+        return ()
+
+    def get_report_detail(self):
+        return dict(self.record.get('detail') or {})
+
+    @property
+    def type(self):
+        return self.record['type']
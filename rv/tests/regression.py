@@ -0,0 +1,86 @@
+import statistics
+
+from rv.excs import LatencyRegression
+from rv.stats import common_language_effect_size, mann_whitney_u, median_ratio
+from rv.tests.base import Test
+
+
+class LatencyComparisonTest(Test):
+    """
+    Test that the latencies of a query group have not regressed compared to a baseline run,
+    using a one-sided Mann-Whitney U test.
+    """
+
+    def __init__(self, suite, group, samples, baseline_samples):
+        super(LatencyComparisonTest, self).__init__(suite)
+        self.group = group
+        self.samples = samples
+        self.baseline_samples = baseline_samples
+        self.result = None
+
+    @property
+    def name(self):
+        return 'Latency: %s' % self.group
+
+    @property
+    def description(self):
+        return (
+            'Latencies of {group} should not be significantly (p < {alpha}) '
+            'and substantially (over {effect:.0%}) worse than in run {run}'
+        ).format(
+            alpha=self.suite.alpha,
+            effect=self.suite.min_effect,
+            group=self.group,
+            run=self.suite.baseline_run_id,
+        )
+
+    def compare(self):
+        """
+        Compare the samples to the baseline samples.
+
+        :return: dict with the `p_value` of the samples being greater, the `median_ratio`,
+                 and the probability of a sample being greater, `cles`
+        :rtype: dict[str, float]
+        """
+        u, p = mann_whitney_u(self.samples, self.baseline_samples)
+        return {
+            'p_value': p,
+            'median_ratio': median_ratio(self.samples, self.baseline_samples),
+            'cles': common_language_effect_size(self.samples, self.baseline_samples),
+        }
+
+    def execute(self):
+        if min(len(self.samples), len(self.baseline_samples)) < self.suite.min_samples:
+            return
+        self.result = self.compare()
+        p = self.result['p_value']
+        if p < self.suite.alpha and self.result['median_ratio'] >= 1 + self.suite.min_effect:
+            yield LatencyRegression(
+                test=self,
+                message=(
+                    '{group}: median latency {median:.1f} ms vs. {baseline_median:.1f} ms '
+                    '({ratio:+.0%}; p={p:.2g}; P(slower)={cles:.2f})'
+                ).format(
+                    baseline_median=statistics.median(self.baseline_samples) * 1000,
+                    cles=self.result['cles'],
+                    group=self.group,
+                    median=statistics.median(self.samples) * 1000,
+                    p=p,
+                    ratio=self.result['median_ratio'] - 1,
+                )
+            )
+
+    def get_report_detail(self):
+        detail = {
+            'samples': len(self.samples),
+            'baseline samples': len(self.baseline_samples),
+            'median (msec)': round(statistics.median(self.samples) * 1000, 2),
+            'baseline median (msec)': round(statistics.median(self.baseline_samples) * 1000, 2),
+        }
+        if self.result:
+            detail.update({
+                'p-value': '%.3g' % self.result['p_value'],
+                'median ratio': round(self.result['median_ratio'], 3),
+                'P(slower than baseline)': round(self.result['cles'], 3),
+            })
+        return detail
@@ -0,0 +1,45 @@
+from rv.excs import LatencySLOViolation
+from rv.stats import percentile
+from rv.tests.base import Test
+
+
+class SLOTest(Test):
+    """
+    Test that the latencies of a query group meet a latency SLO.
+    """
+
+    def __init__(self, suite, slo, samples):
+        super(SLOTest, self).__init__(suite)
+        self.slo = slo
+        self.samples = samples
+        self.observed = None
+
+    @property
+    def name(self):
+        return 'SLO: %s' % self.slo
+
+    def execute(self):
+        if not self.samples:
+            return
+        self.observed = (
+            percentile(self.samples, self.slo.percentile)
+            if self.slo.percentile is not None
+            else max(self.samples)
+        )
+        if self.observed >= self.slo.threshold:
+            n_over = sum(1 for sample in self.samples if sample >= self.slo.threshold)
+            yield LatencySLOViolation(
+                test=self,
+                message='%s: observed %.1f ms (%d of %d requests over the threshold)' % (
+                    self.slo,
+                    self.observed * 1000,
+                    n_over,
+                    len(self.samples),
+                ),
+            )
+
+    def get_report_detail(self):
+        detail = {'samples': len(self.samples)}
+        if self.observed is not None:
+            detail['observed (msec)'] = round(self.observed * 1000, 2)
+        return detail
@@ -1,3 +1,5 @@
+from time import perf_counter
+
 from rv.excs import ValidationException
 from rv.tests.base import Test
 
@@ -12,6 +14,13 @@ class ValidationTest(Test):
             self.name = name
 
     def execute(self):
-        for item in self.items:
-            for err in self.validate(item):
-                yield ValidationException(test=self, item=item, error=err)
+        yield from self.check_items(self.items)
+
+    def check_item(self, item):
+        start_time = perf_counter()
+        errors = list(self.validate(item))
+        self.check_times['validate'] += perf_counter() - start_time
+        return [ValidationException(test=self, item=item, error=err) for err in errors]
+
+    def get_report_detail(self):
+        return (self.sample.get_report_detail() if self.sample else {})
@@ -0,0 +1,179 @@
+from rv.excs import WireEfficiencyError
+from rv.tests.base import Test
+
+
+class PayloadSizeTest(Test):
+    """
+    Test the size of the uncompressed payload, per item.
+    """
+    name = 'Wire: uncompressed payload'
+    num_requests = 1
+
+    def execute(self):
+        measurement = self.suite.uncompressed
+        self.request_duration = measurement['duration']
+        self.response_bytes = measurement['bytes']
+        max_bytes_per_item = self.suite.thresholds.max_bytes_per_item
+        if max_bytes_per_item and measurement['bytes_per_item'] > max_bytes_per_item:
+            yield WireEfficiencyError(
+                test=self,
+                message='%.0f bytes per item (more than %d)' % (measurement['bytes_per_item'], max_bytes_per_item),
+            )
+
+    def get_report_detail(self):
+        measurement = self.suite.__dict__.get('uncompressed')
+        if not measurement:
+            return {}
+        return {
+            'bytes': measurement['bytes'],
+            'items': measurement['items'],
+            'bytes per item': round(measurement['bytes_per_item'], 1),
+        }
+
+
+class CompressionTest(Test):
+    """
+    Test that the endpoint compresses its responses with the given content encoding, and well enough
+    (compared to the uncompressed payload, if the `PayloadSizeTest` has measured it).
+    """
+    num_requests = 1
+    deferred = True  # After the PayloadSizeTest
+
+    def __init__(self, suite, encoding):
+        super(CompressionTest, self).__init__(suite)
+        self.encoding = encoding
+        self.content_encoding = None
+        self.ratio = None
+
+    @property
+    def name(self):
+        return 'Wire: %s compression' % self.encoding
+
+    def reset(self):
+        super(CompressionTest, self).reset()
+        self.content_encoding = None
+        self.ratio = None
+
+    def execute(self):
+        response, body, self.request_duration = self.suite.fetch_raw(encoding=self.encoding)
+        self.response_bytes = len(body)
+        self.content_encoding = response.headers.get('Content-Encoding', 'identity')
+        if self.content_encoding != self.encoding:
+            if self.suite.thresholds.require_compression:
+                yield WireEfficiencyError(
+                    test=self,
+                    message='%s was accepted, but the response was encoded with %s' % (
+                        self.encoding,
+                        self.content_encoding,
+                    ),
+                )
+            return
+        uncompressed = self.suite.__dict__.get('uncompressed')
+        if not uncompressed:  # Not measured (e.g. skipped for a budget); nothing to compare with
+            return
+        self.ratio = uncompressed['bytes'] / max(1, len(body))
+        min_ratio = self.suite.thresholds.min_compression_ratio
+        if min_ratio and self.ratio < min_ratio:
+            yield WireEfficiencyError(
+                test=self,
+                message='compression ratio %.2f (less than %.2f)' % (self.ratio, min_ratio),
+            )
+
+    def get_report_detail(self):
+        detail = {'content encoding': self.content_encoding}
+        if self.response_bytes is not None:
+            detail['bytes'] = self.response_bytes
+            items = self.suite.__dict__.get('uncompressed', {}).get('items')
+            if items:
+                detail['bytes per item'] = round(self.response_bytes / items, 1)
+        if self.ratio is not None:
+            detail['compression ratio'] = round(self.ratio, 2)
+        return detail
+
+
+class PageSizeTest(Test):
+    """
+    Test the latency per item when requesting pages of the given size.
+    """
+    num_requests = 1
+
+    def __init__(self, suite, page_size):
+        super(PageSizeTest, self).__init__(suite)
+        self.page_size = page_size
+        self.num_items = None
+
+    @property
+    def name(self):
+        return 'Wire: %s=%d' % (self.suite.page_size_param, self.page_size)
+
+    @property
+    def query(self):
+        return {self.suite.page_size_param: self.page_size}
+
+    @property
+    def seconds_per_item(self):
+        if self.request_duration is None or not self.num_items:
+            return None
+        return self.request_duration / self.num_items
+
+    def reset(self):
+        super(PageSizeTest, self).reset()
+        self.num_items = None
+
+    def execute(self):
+        response, body, self.request_duration = self.suite.fetch_raw(params=self.query)
+        self.response_bytes = len(body)
+        self.num_items = len(self.suite.get_list(body))
+        max_seconds_per_item = self.suite.thresholds.max_seconds_per_item
+        if max_seconds_per_item and self.seconds_per_item and self.seconds_per_item > max_seconds_per_item:
+            yield WireEfficiencyError(
+                test=self,
+                message='%.2f msec per item (more than %.2f)' % (
+                    self.seconds_per_item * 1000,
+                    max_seconds_per_item * 1000,
+                ),
+            )
+
+    def get_report_detail(self):
+        if self.num_items is None:
+            return {}
+        detail = {
+            'items': self.num_items,
+            'bytes': self.response_bytes,
+        }
+        if self.num_items:
+            detail['msec per item'] = round(self.seconds_per_item * 1000, 3)
+            detail['bytes per item'] = round(self.response_bytes / self.num_items, 1)
+        return detail
+
+
+class CachingHeadersTest(Test):
+    """
+    Test that responses carry caching headers: `Cache-Control`, and a validator
+    (`ETag` or `Last-Modified`) for conditional requests.
+    """
+    name = 'Wire: caching headers'
+    num_requests = 0  # Uses the uncompressed payload's response...
+    deferred = True  # ...so runs after the PayloadSizeTest
+
+    def execute(self):
+        measurement = self.suite.__dict__.get('uncompressed')
+        if not measurement:  # The PayloadSizeTest was not run (e.g. skipped for a budget)
+            self.skipped = True
+            return
+        headers = measurement['headers']
+        if not self.suite.thresholds.require_caching_headers:
+            return
+        if 'Cache-Control' not in headers:
+            yield WireEfficiencyError(test=self, message='no Cache-Control header')
+        if 'ETag' not in headers and 'Last-Modified' not in headers:
+            yield WireEfficiencyError(test=self, message='no ETag or Last-Modified header')
+
+    def get_report_detail(self):
+        measurement = self.suite.__dict__.get('uncompressed')
+        if not measurement:
+            return {}
+        return {
+            name: measurement['headers'].get(name, '(none)')
+            for name in ('Cache-Control', 'ETag', 'Last-Modified', 'Expires', 'Vary')
+        }
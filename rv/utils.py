@@ -1,5 +1,6 @@
 import importlib
 import inspect
+import random
 import sys
 import time
 
@@ -25,6 +26,24 @@ class cached_property(object):
         return value
 
 
+def truncate(s, length, end='...', leeway=5):
+    """
+    Truncate a string to (about) the given length, preferably at a word boundary.
+
+    Works like Jinja's `truncate` filter, without having to import Jinja.
+
+    :param s: String
+    :param length: Length to truncate to (including `end`)
+    :param end: Suffix for truncated strings
+    :param leeway: Strings at most this much longer than `length` are not truncated
+    :return: str
+    """
+    if len(s) <= length + leeway:
+        return s
+    result = s[:length - len(end)].rsplit(' ', 1)[0]
+    return result + end
+
+
 def wallclock():
     """
     Return a number of seconds.
@@ -39,6 +58,16 @@ def wallclock():
         return time.time()
 
 
+def get_random(seed=None):
+    """
+    Get a random number generator of its own, seeded with the given seed, or by default,
+    from the global one (so that seeding that, as with `--seed`, makes runs reproducible).
+
+    :rtype: random.Random
+    """
+    return random.Random(random.getrandbits(64) if seed is None else seed)
+
+
 def find_class(classpath, subclass):
     """
     Find a class object of the given type given a dotted string.
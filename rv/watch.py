@@ -0,0 +1,98 @@
+"""
+Continuous monitoring: run suites over and over in a long-running process.
+
+The suites (and so their connection pools and baselines) are kept between cycles.
+Each cycle, every suite refreshes its state (for `ListTester`s with a `refresh_param`,
+only the items changed since the previous cycle are downloaded), then runs the next
+slice of its tests.  Once all of a suite's tests have been run, its plan is regenerated
+from the refreshed state.
+"""
+import logging
+import time
+
+from rv.events import get_default_bus
+
+log = logging.getLogger(__name__)
+
+
+class Watcher(object):
+
+    def __init__(
+        self,
+        suites,
+        *,
+        interval,
+        slice_size=0,
+        max_cycles=0,
+        on_test_finished=None,
+        on_cycle_finished=None,
+        events=None
+    ):
+        """
+        :param suites: The suites to watch.
+        :param interval: Seconds between the starts of cycles.
+        :param slice_size: The number of tests of each suite to run each cycle; 0 for all of them.
+        :param max_cycles: The number of cycles to run; 0 to run until interrupted.
+        :param on_test_finished: An optional callable to call with each test as soon as it has been run.
+        :param on_cycle_finished: An optional callable to call with the cycle number after each cycle.
+        :param events: The `rv.events.EventBus` to publish the progress to. By default, it is printed to stdout.
+        """
+        self.suites = suites
+        self.interval = interval
+        self.slice_size = slice_size
+        self.max_cycles = max_cycles
+        self.on_test_finished = on_test_finished
+        self.on_cycle_finished = on_cycle_finished
+        self.events = (events or get_default_bus())
+        self.offsets = {suite.name: 0 for suite in suites}
+        self.cycle = 0
+
+    def run(self):
+        """
+        Run cycles until `max_cycles` is reached or the process is interrupted.
+        """
+        try:
+            while not self.max_cycles or self.cycle < self.max_cycles:
+                start_time = time.time()
+                self.cycle += 1
+                self.run_cycle()
+                if self.on_cycle_finished:
+                    self.on_cycle_finished(self.cycle)
+                if self.max_cycles and self.cycle >= self.max_cycles:
+                    break
+                time.sleep(max(0, self.interval - (time.time() - start_time)))
+        except KeyboardInterrupt:
+            log.info('interrupted after %d cycles', self.cycle)
+
+    def run_cycle(self):
+        for suite in self.suites:
+            if self.cycle > 1:
+                suite.refresh()
+            tests = self.get_slice(suite)
+            print('## %s (cycle %d: %d tests)' % (suite.name, self.cycle, len(tests)))
+            self.events.publish('suite_started', suite=suite, total=len(tests))
+            n_errors = 0
+            for test in tests:
+                test.reset()
+                self.events.publish('test_started', suite=suite, test=test)
+                test.run()
+                if self.on_test_finished:
+                    self.on_test_finished(test)
+                n_errors += len(test.errors)
+                self.events.publish_test_finished(test)
+            self.events.publish('suite_finished', suite=suite)
+            self.events.flush()  # Before the tests are reset for the next cycle
+            print('%d tests, %d errors' % (len(tests), n_errors))
+
+    def get_slice(self, suite):
+        """
+        Get the next slice of the suite's tests, rotating through them
+        (and replanning whenever the end is reached).
+        """
+        offset = self.offsets[suite.name]
+        if offset and offset >= len(suite.tests):
+            suite.replan()
+            offset = 0
+        size = (self.slice_size or len(suite.tests))
+        self.offsets[suite.name] = offset + size
+        return suite.tests[offset:offset + size]